@@ -0,0 +1,183 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import main
+
+SEED = 1234
+CATEGORY_NAMES = {category: x.__name__ for category, x in main.Evaluate.CATEGORIES.items()}
+
+
+def GetDeal(rng, players, board_size=5):
+    cards = rng.sample(main.Card.DECK, board_size + 2 * players)
+    hands = [main.Hand(cards[x:x + 2]) for x in range(board_size, len(cards), 2)]
+    return main.CommunityCards(cards[:board_size]), hands
+
+
+def GetCategory(cards):
+    return main.LookupTable.keys[main.Evaluate.GetStrength(cards, main.EvalMode.TABLE)][0]
+
+
+def GetCategoryCards(rng, category):
+    main.LookupTable.GenerateStrengths()
+    keys = [x for x in main.LookupTable.keys[1:] if x[0] == category]
+    while True:
+        key = rng.choice(keys)
+        if category in (5, 9):
+            high = key[1][0]
+            values = [14, 2, 3, 4, 5] if high == 5 else list(range(high - 4, high + 1))
+        elif category in (1, 6):
+            values = list(key[1])
+        else:
+            counts = {2: [2, 1, 1, 1], 3: [2, 2, 1], 4: [3, 1, 1], 7: [3, 2], 8: [4, 1]}[category]
+            values = [value for value, count in zip(key[1], counts) for i in range(count)]
+        if category in (6, 9):
+            suit = rng.randrange(4)
+            suits = [suit] * 5
+        else:
+            suits = [rng.randrange(4) for x in values]
+        indices = {suit * 13 + value - 2 for suit, value in zip(suits, values)}
+        if len(indices) != 5:
+            continue
+        indices |= set(rng.sample([x for x in range(52) if x not in indices], 2))
+        cards = [main.Card.DECK[x] for x in indices]
+        rng.shuffle(cards)
+        if GetCategory(cards) == category:
+            return cards
+
+
+def GetBenchmarks(quick=False):
+    scale = 1 if quick else 10
+    benchmarks = []
+
+    for category, name in CATEGORY_NAMES.items():
+        rng = random.Random(f"{SEED}-read-{category}")
+        inputs = []
+        for i in range(50 * scale):
+            cards = GetCategoryCards(rng, category)
+            inputs.append((main.Hand(cards[:2]), main.CommunityCards(cards[2:])))
+        benchmarks.append((f"read/{name}", lambda x: x[0].Read(x[1]), inputs))
+
+    for players in range(2, 11):
+        rng = random.Random(f"{SEED}-showdown-{players}")
+        inputs = [GetDeal(rng, players) for i in range(50 * scale)]
+        benchmarks.append((f"showdown/{players}", lambda x: main.Evaluate.GetWinnerHands(*x), inputs))
+
+    deck = main.Deck(rng=random.Random(SEED))
+
+    def DealCycle(cards):
+        deck.Reset()
+        for i in range(cards):
+            deck.GetCard()
+
+    benchmarks.append(("deck/deal9", DealCycle, [9] * 200 * scale))
+
+    rng = random.Random(f"{SEED}-equity")
+    inputs = [GetDeal(rng, 2, 4) for i in range(2 * scale)]
+    benchmarks.append(("equity/exact_turn", lambda x: main.Equity.Exact(x[1], x[0]), inputs))
+    inputs = [(x[1], random.Random(f"{SEED}-{i}").randrange(1 << 30)) for i, x in enumerate(inputs)]
+    benchmarks.append(("equity/montecarlo_1000",
+                       lambda x: main.Equity.MonteCarlo(x[0], iterations=1000, seed=x[1]), inputs))
+
+    rng = random.Random(f"{SEED}-batch")
+    inputs = [[GetDeal(rng, 6) for i in range(1000)] for j in range(scale)]
+    benchmarks.append(("batch/winners_1000", lambda x: list(main.Evaluate.GetBatchWinnerHands(x)), inputs))
+    if main.np is not None:
+        rng = random.Random(f"{SEED}-numpy")
+        inputs = [main.np.array([rng.sample(range(52), 7) for i in range(10000)]) for j in range(scale)]
+        benchmarks.append(("batch/numpy_10000", main.LookupTable.GetBatchStrengths, inputs))
+    return benchmarks
+
+
+def GetPercentile(values, percentile):
+    index = (len(values) - 1) * percentile / 100
+    low = int(index)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (index - low)
+
+
+def Run(benchmarks, rounds=3, warmup=1):
+    results = {}
+    for name, function, inputs in benchmarks:
+        for x in inputs[:warmup]:
+            function(x)
+        timings = []
+        for i in range(rounds):
+            for x in inputs:
+                start = time.perf_counter_ns()
+                function(x)
+                timings.append(time.perf_counter_ns() - start)
+        timings.sort()
+        results[name] = {
+            "ops": len(timings),
+            "ops_per_sec": len(timings) / (sum(timings) / 1e9),
+            "p50_us": GetPercentile(timings, 50) / 1e3,
+            "p90_us": GetPercentile(timings, 90) / 1e3,
+            "p99_us": GetPercentile(timings, 99) / 1e3,
+        }
+    return results
+
+
+def Compare(results, baseline, threshold=0.2):
+    regressions = []
+    lines = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["ops_per_sec"] / baseline[name]["ops_per_sec"]
+        status = "REGRESSION" if ratio < 1 - threshold else "ok"
+        if status != "ok":
+            regressions.append(name)
+        lines.append(f"{name:<28}{baseline[name]['ops_per_sec']:>14.1f}{result['ops_per_sec']:>14.1f}"
+                     f"{ratio:>9.2f}x  {status}")
+    return regressions, lines
+
+
+def Format(results):
+    lines = [f"{'benchmark':<28}{'ops/sec':>14}{'p50 us':>12}{'p90 us':>12}{'p99 us':>12}"]
+    for name, result in results.items():
+        lines.append(f"{name:<28}{result['ops_per_sec']:>14.1f}{result['p50_us']:>12.2f}"
+                     f"{result['p90_us']:>12.2f}{result['p99_us']:>12.2f}")
+    return lines
+
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(prog="python bench.py", description="Benchmarks the evaluator hot paths.")
+    parser.add_argument("-q", "--quick", action="store_true", help="run a tenth of the inputs")
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks containing this string")
+    parser.add_argument("-r", "--rounds", type=int, default=3, help="timed rounds per benchmark")
+    parser.add_argument("-s", "--save", help="save the results as a JSON baseline")
+    parser.add_argument("-c", "--compare", help="compare the results against a JSON baseline")
+    parser.add_argument("-t", "--threshold", type=float, default=0.2, help="allowed ops/sec drop before failing")
+    parser.add_argument("-o", "--output", default="bench_output.txt", help="text report path")
+    args = parser.parse_args(argv)
+
+    main.LookupTable.Generate()
+    benchmarks = [x for x in GetBenchmarks(args.quick) if args.filter in x[0]]
+    results = Run(benchmarks, args.rounds)
+    lines = Format(results)
+    regressions = []
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["benchmarks"]
+        regressions, compare_lines = Compare(results, baseline, args.threshold)
+        lines += ["", f"{'benchmark':<28}{'baseline':>14}{'current':>14}{'ratio':>9}"] + compare_lines
+        if regressions:
+            lines += ["", f"{len(regressions)} regression(s): {', '.join(regressions)}"]
+    report = "\n".join(lines) + "\n"
+    sys.stdout.write(report)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"python": platform.python_version(), "seed": SEED, "quick": args.quick,
+                       "benchmarks": results}, file, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
@@ -1,4 +1,28 @@
+import argparse
+import cProfile
+import io
+import json
+import mmap
+import os
+import pstats
 import random
+import re
+import struct
+import sys
+import threading
+import time
+import tracemalloc
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import combinations, combinations_with_replacement, islice, permutations
+from math import comb
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class PokerExceptions(Exception):
@@ -17,6 +41,9 @@ class PokerExceptions(Exception):
     class IncorrectCardString(Exception):
         pass
 
+    class IncorrectRangeString(Exception):
+        pass
+
 
 class Suit:
     HEART = "h"
@@ -26,27 +53,80 @@ class Suit:
     SUITS = [HEART, DIAMOND, SPADE, CLUB]
 
 
+class EvalMode:
+    TABLE = "table"
+    HISTOGRAM = "histogram"
+    DETECTORS = "detectors"
+    MODES = [TABLE, HISTOGRAM, DETECTORS]
+
+
 class Card:
-    def __init__(self, card_string):
-        if type(card_string) is not str or len(card_string) < 2:
-            raise PokerExceptions.IncorrectCardString("Cannot create a card with this card_string")
-        self.suit = card_string[-1].lower()
-        self.rank = "".join(card_string[:-1]).upper()
-        if self.suit not in Suit.SUITS:
-            raise PokerExceptions.IncorrectSuit("Cannot create card without a correct suit!")
-        if self.rank not in ["A", "K", "Q", "J", "10", "9", "8", "7", "6", "5", "4", "3", "2"]:
-            raise PokerExceptions.IncorrectRank("Cannot create card without a correct rank!")
-        self.display = self.rank+self.suit
-        self.value = self.GetValue()
+    __slots__ = ["suit", "rank", "display", "value", "index"]
+    RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+    DECK = []
+    parsed = {}
+
+    def __new__(cls, card_string):
+        return Card.Parse(card_string)
 
     def __eq__(self, other):
         if isinstance(other, Card):
-            return self.display == other.display
+            return self.index == other.index
         return False
 
+    def __hash__(self):
+        return self.index
+
     def __repr__(self):
         return self.display
 
+    def __reduce__(self):
+        return Card.FromIndex, (self.index,)
+
+    def __setattr__(self, name, value):
+        field = getattr(Card, name, None)
+        try:
+            field.__get__(self)
+        except AttributeError:
+            object.__setattr__(self, name, value)
+            return
+        raise AttributeError(f"Card object is immutable, can't set {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Card object is immutable, can't delete {name}")
+
+    @staticmethod
+    def Parse(card_string):
+        if type(card_string) is not str or len(card_string) < 2:
+            raise PokerExceptions.IncorrectCardString("Cannot create a card with this card_string")
+        card = Card.parsed.get(card_string)
+        if card is None:
+            suit = card_string[-1].lower()
+            rank = card_string[:-1].upper()
+            if suit not in Suit.SUITS:
+                raise PokerExceptions.IncorrectSuit("Cannot create card without a correct suit!")
+            if rank not in Card.RANKS:
+                raise PokerExceptions.IncorrectRank("Cannot create card without a correct rank!")
+            card = Card.DECK[Suit.SUITS.index(suit) * 13 + Card.RANKS.index(rank)]
+            Card.parsed[card_string] = card
+        return card
+
+    @staticmethod
+    def FromIndex(index):
+        if type(index) is not int or not 0 <= index < 52:
+            raise PokerExceptions.IncorrectCardString("Cannot create a card with this index")
+        return Card.DECK[index]
+
+    @staticmethod
+    def Create(index):
+        card = object.__new__(Card)
+        card.index = index
+        card.suit = Suit.SUITS[index // 13]
+        card.rank = Card.RANKS[index % 13]
+        card.display = card.rank + card.suit
+        card.value = card.GetValue()
+        return card
+
     def GetValue(self):
         rank = self.rank
         if rank.isnumeric():
@@ -61,6 +141,76 @@ class Card:
             return 14
 
 
+Card.DECK = [Card.Create(x) for x in range(52)]
+
+
+class CardSet:
+    __slots__ = ["mask"]
+    FULL = (1 << 52) - 1
+
+    def __init__(self, cards=None):
+        self.mask = 0
+        for card in cards or []:
+            self.mask |= 1 << card.index
+
+    def __repr__(self):
+        return "".join([x.display for x in self])
+
+    def __eq__(self, other):
+        if isinstance(other, CardSet):
+            return self.mask == other.mask
+        return False
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __len__(self):
+        return bin(self.mask).count("1")
+
+    def __bool__(self):
+        return self.mask != 0
+
+    def __contains__(self, card):
+        return self.mask >> card.index & 1 == 1
+
+    def __iter__(self):
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            yield Card.DECK[low.bit_length() - 1]
+            mask ^= low
+
+    def __or__(self, other):
+        return CardSet.FromMask(self.mask | other.mask)
+
+    def __and__(self, other):
+        return CardSet.FromMask(self.mask & other.mask)
+
+    def __sub__(self, other):
+        return CardSet.FromMask(self.mask & ~other.mask)
+
+    def __xor__(self, other):
+        return CardSet.FromMask(self.mask ^ other.mask)
+
+    def __invert__(self):
+        return CardSet.FromMask(CardSet.FULL ^ self.mask)
+
+    @staticmethod
+    def FromMask(mask):
+        card_set = object.__new__(CardSet)
+        card_set.mask = mask
+        return card_set
+
+    def IsDisjoint(self, other):
+        return self.mask & other.mask == 0
+
+    def GetCards(self):
+        return list(self)
+
+    def GetStrength(self):
+        return LookupTable.GetMaskStrength(self.mask)
+
+
 class Hand:
     
     def __init__(self, cards=None):
@@ -72,40 +222,51 @@ class Hand:
     def __repr__(self):
         return "".join([x.display for x in self.cards])
 
-    def Read(self, comm_cards):
+    @staticmethod
+    def FromCardSet(card_set):
+        return Hand(list(card_set))
+
+    def GetCardSet(self):
+        return CardSet(self.cards)
+
+    def Read(self, comm_cards, mode=None):
+        mode = mode or Evaluate.mode
+        all_cards = comm_cards.cards + self.cards
+        if mode == EvalMode.DETECTORS or not 5 <= len(all_cards) <= 7:
+            return self.ReadDetectors(comm_cards)
+        return Evaluate.FromStrength(Evaluate.GetStrength(all_cards, mode), all_cards)
+
+    def ReadDetectors(self, comm_cards):
         ev = Evaluate()
 
         royalflush = ev.RoyalFlush.IsRoyalFlush(comm_cards, self)
-        straightflush = ev.StraightFlush.IsStraightFlush(comm_cards, self)
-        quads = ev.Quads.IsQuads(comm_cards, self)
-        fullhouse = ev.FullHouse.IsFullHouse(comm_cards, self)
-        flush = ev.Flush.IsFlush(comm_cards, self)
-        straight = ev.Straight.IsStraight(comm_cards, self)
-        threeofkind = ev.ThreeOfKind.IsThreeOfKind(comm_cards, self)
-        twopair = ev.TwoPair.IsTwoPair(comm_cards, self)
-        pair = ev.Pair.IsPair(comm_cards, self)
-        high = ev.High.IsHigh(comm_cards, self)
-
         if royalflush:
             return royalflush
-        elif straightflush:
+        straightflush = ev.StraightFlush.IsStraightFlush(comm_cards, self)
+        if straightflush:
             return straightflush
-        elif quads:
+        quads = ev.Quads.IsQuads(comm_cards, self)
+        if quads:
             return quads
-        elif fullhouse:
+        fullhouse = ev.FullHouse.IsFullHouse(comm_cards, self)
+        if fullhouse:
             return fullhouse
-        elif flush:
+        flush = ev.Flush.IsFlush(comm_cards, self)
+        if flush:
             return flush
-        elif straight:
+        straight = ev.Straight.IsStraight(comm_cards, self)
+        if straight:
             return straight
-        elif threeofkind:
+        threeofkind = ev.ThreeOfKind.IsThreeOfKind(comm_cards, self)
+        if threeofkind:
             return threeofkind
-        elif twopair:
+        twopair = ev.TwoPair.IsTwoPair(comm_cards, self)
+        if twopair:
             return twopair
-        elif pair:
+        pair = ev.Pair.IsPair(comm_cards, self)
+        if pair:
             return pair
-        else:
-            return high
+        return ev.High.IsHigh(comm_cards, self)
 
 
 class CommunityCards:
@@ -115,6 +276,8 @@ class CommunityCards:
             self.cards = []
         else:
             self.cards = cards
+        self.state = None
+        self.players = []
 
     def __repr__(self):
         return "".join([x.display for x in self.cards])
@@ -142,6 +305,7 @@ class CommunityCards:
         if len(self.cards) != 0:
             raise Exception("Flop already pushed!")
         self.cards.extend(card_list)
+        self.Update(card_list)
 
     def PushTurn(self, card):
         if type(card) != Card:
@@ -151,6 +315,7 @@ class CommunityCards:
         if len(self.cards) > 3:
             raise Exception("Turn already pushed!")
         self.cards.append(card)
+        self.Update([card])
 
     def PushRiver(self, card):
         if type(card) != Card:
@@ -160,22 +325,313 @@ class CommunityCards:
         if len(self.cards) > 4:
             raise Exception("Turn already pushed!")
         self.cards.append(card)
+        self.Update([card])
 
     def GetSuits(self):
         return [x.suit for x in self.cards]
 
+    @staticmethod
+    def FromCardSet(card_set):
+        return CommunityCards(list(card_set))
+
+    def GetCardSet(self):
+        return CardSet(self.cards)
+
+    def GetState(self):
+        if self.state is None or self.state.cards != self.cards:
+            self.state = BoardState(self.cards)
+            self.players = [(hand, BoardState(self.cards + hand.cards)) for hand, state in self.players]
+        return self.state
+
+    def Update(self, card_list):
+        if self.state is None or self.state.cards + list(card_list) != self.cards:
+            self.GetState()
+            return
+        for card in card_list:
+            self.state.Add(card)
+            for hand, state in self.players:
+                state.Add(card)
+
+    def AddPlayer(self, hand):
+        self.GetState()
+        self.players.append((hand, BoardState(self.cards + hand.cards)))
+
+    def RemovePlayer(self, hand):
+        self.players = [x for x in self.players if x[0] is not hand]
+
+    def GetPlayers(self):
+        return [hand for hand, state in self.players]
+
+    def GetPlayerStrength(self, hand, mode=None):
+        self.GetState()
+        for player, state in self.players:
+            if player is hand:
+                if not 5 <= len(state.cards) <= 7:
+                    return None
+                return state.GetStrength([], mode)
+        raise ValueError(f"{hand} is not a player on this board!")
+
+    def GetPlayerStrengths(self, mode=None):
+        return [self.GetPlayerStrength(hand, mode) for hand in self.GetPlayers()]
+
+    def GetShowdown(self, mode=None):
+        return Showdown(self, self.GetPlayers(), self.GetPlayerStrengths(mode))
+
+
+class BoardState:
+
+    def __init__(self, cards=None):
+        self.cards = []
+        self.counts = [0] * 15
+        self.masks = [0, 0, 0, 0]
+        self.product = 1
+        for card in cards or []:
+            self.Add(card)
+
+    def __repr__(self):
+        return "".join([x.display for x in self.cards])
+
+    def Add(self, card):
+        self.counts[card.value] += 1
+        self.masks[card.index // 13] |= LookupTable.CARD_BITS[card.index]
+        self.product *= LookupTable.CARD_PRIMES[card.index]
+        self.cards.append(card)
+
+    def GetStrength(self, cards, mode=None):
+        mode = mode or Evaluate.mode
+        masks = self.masks[:]
+        for card in cards:
+            masks[card.index // 13] |= LookupTable.CARD_BITS[card.index]
+        cache = Evaluate.cache
+        if cache is None:
+            return self.ComputeStrength(cards, masks, mode)
+        key = EvalCache.GetMaskKey(masks)
+        strength = cache.Get(key)
+        if strength is None:
+            strength = self.ComputeStrength(cards, masks, mode)
+            cache.Put(key, strength)
+        return strength
+
+    def ComputeStrength(self, cards, masks, mode):
+        if mode == EvalMode.TABLE:
+            LookupTable.Generate()
+            product = self.product
+            for card in cards:
+                product *= LookupTable.CARD_PRIMES[card.index]
+            return LookupTable.Lookup(product, masks)
+        if mode == EvalMode.HISTOGRAM:
+            LookupTable.GenerateStrengths()
+            counts = self.counts[:]
+            for card in cards:
+                counts[card.value] += 1
+            return LookupTable.strengths[Evaluate.Classify(counts, masks)]
+        raise ValueError(f"Cannot get a strength in {mode} mode!")
+
+
+class Showdown:
+
+    def __init__(self, comm_cards, hands, strengths):
+        self.comm_cards = comm_cards
+        self.hands = hands
+        self.strengths = strengths
+        self.pokerhands = [None] * len(hands)
+        self.ranking = []
+        last_strength = None
+        for i in sorted(range(len(hands)), key=lambda x: strengths[x], reverse=True):
+            if strengths[i] != last_strength:
+                self.ranking.append([])
+                last_strength = strengths[i]
+            self.ranking[-1].append(hands[i])
+        self.winners = self.ranking[0] if self.ranking else []
+
+    def __repr__(self):
+        return " > ".join(["=".join([str(x) for x in group]) for group in self.ranking])
+
+    def GetIndex(self, hand):
+        for i, x in enumerate(self.hands):
+            if x is hand:
+                return i
+        raise ValueError(f"{hand} is not in this showdown!")
+
+    def GetStrength(self, hand):
+        return self.strengths[self.GetIndex(hand)]
+
+    def GetRank(self, hand):
+        strength = self.GetStrength(hand)
+        for rank, group in enumerate(self.ranking):
+            if self.GetStrength(group[0]) == strength:
+                return rank
+
+    def GetPokerHand(self, hand):
+        i = self.GetIndex(hand)
+        if self.pokerhands[i] is None:
+            self.pokerhands[i] = Evaluate.FromStrength(self.strengths[i], self.comm_cards.cards + hand.cards)
+        return self.pokerhands[i]
+
+    def GetWinnerHands(self, hands):
+        strengths = [self.GetStrength(x) for x in hands]
+        best_strength = max(strengths)
+        return [hand for hand, strength in zip(hands, strengths) if strength == best_strength]
+
+
+class EvalCache:
+
+    def __init__(self, maxsize=100000):
+        if maxsize <= 0:
+            raise ValueError("Cache size should be positive!")
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"EvalCache({len(self.entries)}/{self.maxsize}, hits={self.hits}, misses={self.misses}, " \
+               f"evictions={self.evictions})"
+
+    @staticmethod
+    def GetKey(cards):
+        masks = [0, 0, 0, 0]
+        for card in cards:
+            masks[card.index // 13] |= LookupTable.CARD_BITS[card.index]
+        return EvalCache.GetMaskKey(masks)
+
+    @staticmethod
+    def GetMaskKey(masks):
+        masks = sorted(masks)
+        return masks[3] << 39 | masks[2] << 26 | masks[1] << 13 | masks[0]
+
+    def Get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return value
+
+    def Put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def Clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def GetStats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
 
 class Evaluate:
+    mode = EvalMode.TABLE
+    cache = None
+
+    @staticmethod
+    def GetWinnerHands(comm_cards, hands, mode=None):
+        if not all(5 <= len(comm_cards.cards) + len(x.cards) <= 7 for x in hands):
+            return Evaluate.GetWinnerHandsDetectors(comm_cards, hands)
+        return Evaluate.GetShowdown(comm_cards, hands, mode).winners
+
+    @staticmethod
+    def GetShowdown(comm_cards, hands, mode=None):
+        mode = mode or Evaluate.mode
+        if mode == EvalMode.DETECTORS:
+            pokerhands = [x.ReadDetectors(comm_cards) for x in hands]
+            showdown = Showdown(comm_cards, hands, [x.GetStrength() for x in pokerhands])
+            showdown.pokerhands = pokerhands
+            return showdown
+        board = comm_cards.GetState()
+        return Showdown(comm_cards, hands, [board.GetStrength(x.cards, mode) for x in hands])
+
+    @staticmethod
+    def GetBatchWinnerHands(deals, workers=1, chunksize=1000):
+        for comm_cards, hands, strengths in Evaluate.GetBatchResults(deals, workers, chunksize):
+            if strengths is None:
+                yield Evaluate.GetWinnerHandsDetectors(comm_cards, hands)
+            else:
+                best_strength = max(strengths)
+                yield [hand for hand, strength in zip(hands, strengths) if strength == best_strength]
+
+    @staticmethod
+    def GetBatchShowdowns(deals, workers=1, chunksize=1000):
+        for comm_cards, hands, strengths in Evaluate.GetBatchResults(deals, workers, chunksize):
+            if strengths is None:
+                raise ValueError("Batch showdowns need 5 to 7 cards for every hand!")
+            yield Showdown(comm_cards, hands, strengths)
+
     @staticmethod
-    def GetWinnerHands(comm_cards, hands):
-        best_hand = hands[0]
+    def GetBatchResults(deals, workers=1, chunksize=1000):
+        chunks = Evaluate.GetShowdownChunks(deals, chunksize)
+        if workers == 1:
+            LookupTable.Generate()
+            for chunk, job in chunks:
+                yield from Evaluate.CollectResults(chunk, ShowdownWorker(job))
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk, job in chunks:
+                pending.append((chunk, executor.submit(ShowdownWorker, job)))
+                if len(pending) > 2 * workers:
+                    chunk, future = pending.popleft()
+                    yield from Evaluate.CollectResults(chunk, future.result())
+            while pending:
+                chunk, future = pending.popleft()
+                yield from Evaluate.CollectResults(chunk, future.result())
+
+    @staticmethod
+    def GetShowdownChunks(deals, chunksize):
+        deals = iter(deals)
+        while True:
+            chunk = list(islice(deals, chunksize))
+            if not chunk:
+                return
+            boards, counts, hand_masks = array("Q"), array("B"), array("Q")
+            for comm_cards, hands in chunk:
+                boards.append(CardSet(comm_cards.cards).mask)
+                counts.append(len(hands))
+                hand_masks.extend([CardSet(x.cards).mask for x in hands])
+            yield chunk, (boards, counts, hand_masks)
+
+    @staticmethod
+    def CollectResults(chunk, strengths):
+        position = 0
+        for comm_cards, hands in chunk:
+            deal_strengths = strengths[position:position + len(hands)].tolist()
+            position += len(hands)
+            if not all(deal_strengths) and not all(5 <= len(comm_cards.cards) + len(x.cards) <= 7 for x in hands):
+                deal_strengths = None
+            yield comm_cards, hands, deal_strengths
+
+    @staticmethod
+    def GetWinnerHandsDetectors(comm_cards, hands):
+        best_hand_pokerhand = hands[0].ReadDetectors(comm_cards)
         winner_hands = []
         for hand in hands:
-            hand_pokerhand = hand.Read(comm_cards)
-            best_hand_pokerhand = best_hand.Read(comm_cards)
+            hand_pokerhand = hand.ReadDetectors(comm_cards)
 
             if hand_pokerhand > best_hand_pokerhand:
-                best_hand = hand
+                best_hand_pokerhand = hand_pokerhand
                 winner_hands.clear()
                 winner_hands.append(hand)
             elif hand_pokerhand == best_hand_pokerhand:
@@ -183,28 +639,192 @@ class Evaluate:
 
         return winner_hands
 
+    @staticmethod
+    def GetStrength(all_cards, mode=None):
+        mode = mode or Evaluate.mode
+        cache = Evaluate.cache
+        if cache is None:
+            return Evaluate.ComputeStrength(all_cards, mode)
+        key = EvalCache.GetKey(all_cards)
+        strength = cache.Get(key)
+        if strength is None:
+            strength = Evaluate.ComputeStrength(all_cards, mode)
+            cache.Put(key, strength)
+        return strength
+
+    @staticmethod
+    def SetCache(maxsize):
+        Evaluate.cache = EvalCache(maxsize) if maxsize else None
+        return Evaluate.cache
+
+    @staticmethod
+    def ComputeStrength(all_cards, mode):
+        if mode == EvalMode.TABLE:
+            return LookupTable.GetStrength(all_cards)
+        if mode == EvalMode.HISTOGRAM:
+            LookupTable.GenerateStrengths()
+            return LookupTable.strengths[Evaluate.Analyze(all_cards)]
+        raise ValueError(f"Cannot get a strength in {mode} mode!")
+
+    @staticmethod
+    def Analyze(all_cards):
+        counts = [0] * 15
+        suit_masks = [0, 0, 0, 0]
+        for card in all_cards:
+            counts[card.value] += 1
+            suit_masks[card.index // 13] |= LookupTable.CARD_BITS[card.index]
+        return Evaluate.Classify(counts, suit_masks)
+
+    @staticmethod
+    def Classify(counts, suit_masks):
+        key = LookupTable.GetRankKey(counts)
+        if key[0] >= 7:
+            return key
+        for suit_mask in suit_masks:
+            if bin(suit_mask).count("1") >= 5:
+                high = LookupTable.GetStraightHigh(suit_mask)
+                if high:
+                    return 9, (high,)
+                values = [rank + 2 for rank in range(12, -1, -1) if suit_mask >> rank & 1]
+                return 6, tuple(values[:5])
+        return key
+
+    @staticmethod
+    def FromStrength(strength, all_cards):
+        category, ranks = LookupTable.keys[strength]
+        pokerhand_class = Evaluate.RoyalFlush if category == 9 and ranks[0] == 14 else Evaluate.CATEGORIES[category]
+        pokerhand = pokerhand_class.__new__(pokerhand_class)
+        packed = 0
+        for i, card in enumerate(all_cards):
+            packed |= (card.index + 1) << 6 * i
+        object.__setattr__(pokerhand, "strength", strength)
+        object.__setattr__(pokerhand, "packed", packed)
+        return pokerhand
+
+    @staticmethod
+    def GetBatchStrengths(cards, hole_cards=None):
+        if hole_cards is None:
+            return LookupTable.GetBatchStrengths(cards)
+        if np is None:
+            raise ImportError("NumPy is required for batch evaluation!")
+        boards = np.asarray(cards, dtype=np.int64)
+        hole_cards = np.asarray(hole_cards, dtype=np.int64)
+        if boards.ndim == 1:
+            boards = np.broadcast_to(boards, (len(hole_cards), len(boards)))
+        return LookupTable.GetBatchStrengths(np.concatenate([boards, hole_cards], axis=1))
+
+    @staticmethod
+    def GetFlushCards(all_cards):
+        for suit in Suit.SUITS:
+            suited = [x for x in all_cards if x.suit == suit]
+            if len(suited) >= 5:
+                return sorted(suited, key=lambda x: x.value, reverse=True)
+        return []
+
+    @staticmethod
+    def GetStraightCards(cards, high):
+        values = [14, 2, 3, 4, 5] if high == 5 else list(range(high, high - 5, -1))
+        return [next(x for x in cards if x.value == value) for value in values]
+
     class PokerHand:
+        __slots__ = ("strength", "packed")
+
+        def __getattr__(self, name):
+            if name in ("strength", "packed"):
+                return None
+            if name not in type(self).__slots__ or self.packed is None:
+                raise AttributeError(f"{type(self).__name__} object has no attribute {name}")
+            pokerhand = type(self).FromRanks(LookupTable.keys[self.strength][1], self.GetCards())
+            for field in type(self).__slots__:
+                object.__setattr__(self, field, getattr(pokerhand, field))
+            return getattr(self, name)
+
+        def __setattr__(self, name, value):
+            field = getattr(type(self), name, None)
+            try:
+                field.__get__(self)
+            except AttributeError:
+                object.__setattr__(self, name, value)
+                return
+            raise AttributeError(f"{type(self).__name__} object is immutable, can't set {name}")
+
+        def __delattr__(self, name):
+            raise AttributeError(f"{type(self).__name__} object is immutable, can't delete {name}")
+
+        def GetCards(self):
+            cards = []
+            packed = self.packed
+            while packed:
+                cards.append(Card.DECK[(packed & 63) - 1])
+                packed >>= 6
+            return cards
+
         def __repr__(self):
             return "".join([x.display for x in self.cards])
 
+        def GetStrength(self):
+            if self.strength is None:
+                LookupTable.GenerateStrengths()
+                strength = LookupTable.strengths.get(self.GetKey())
+                if strength is None:
+                    return None
+                self.strength = strength
+            return self.strength
+
+        def __hash__(self):
+            strength = self.GetStrength()
+            if strength is None:
+                return hash(self.GetKey())
+            return hash(strength)
+
+        def __eq__(self, other):
+            if not isinstance(other, Evaluate.PokerHand):
+                return False
+            strength, other_strength = self.GetStrength(), other.GetStrength()
+            if strength is None or other_strength is None:
+                return self.GetKey() == other.GetKey()
+            return strength == other_strength
+
+        def __lt__(self, other):
+            if not isinstance(other, Evaluate.PokerHand):
+                return NotImplemented
+            strength, other_strength = self.GetStrength(), other.GetStrength()
+            if strength is None or other_strength is None:
+                return self.GetKey() < other.GetKey()
+            return strength < other_strength
+
+        def __le__(self, other):
+            if not isinstance(other, Evaluate.PokerHand):
+                return NotImplemented
+            return not other < self
+
+        def __gt__(self, other):
+            if not isinstance(other, Evaluate.PokerHand):
+                return NotImplemented
+            return other < self
+
+        def __ge__(self, other):
+            if not isinstance(other, Evaluate.PokerHand):
+                return NotImplemented
+            return not self < other
+
     class RoyalFlush(PokerHand):
+        __slots__ = ("cards", "suit")
+        value = 10
+
         def __init__(self, cards):
             self.cards = cards
             self.suit = cards[0].suit
-            self.value = 10
 
         def GetName(self):
             return "RoyalFlush"
 
-        def __gt__(self, other):
-            if isinstance(other, Evaluate.PokerHand):
-                return not isinstance(other, Evaluate.RoyalFlush)
-            return False
+        def GetKey(self):
+            return 9, (14,)
 
-        def __eq__(self, other):
-            if isinstance(other, Evaluate.RoyalFlush):
-                return self.cards == other.cards
-            return False
+        @staticmethod
+        def FromRanks(ranks, all_cards):
+            return Evaluate.RoyalFlush(Evaluate.GetStraightCards(Evaluate.GetFlushCards(all_cards), ranks[0]))
 
         @staticmethod
         def IsRoyalFlush(comm_cards, hand):
@@ -216,27 +836,25 @@ class Evaluate:
             return False
 
     class StraightFlush(PokerHand):
+        __slots__ = ("cards", "high", "suit")
+        value = 9
+
         def __init__(self, cards):
             self.cards = cards
-            self.high = cards[0]
+            self.high = cards[-1] if cards[0].value == 14 and cards[1].value == 2 else cards[0]
             self.suit = cards[0].suit
-            self.value = 9
 
         def GetName(self):
             return f"{self.high.rank} high StraightFlush"
 
-        def __gt__(self, other):
-            if isinstance(other, Evaluate.PokerHand):
-                if isinstance(other, Evaluate.StraightFlush):
-                    return self.high.value > other.high.value
-                else:
-                    return self.value > other.value
-            return False
+        def GetKey(self):
+            return 9, (self.high.value,)
 
-        def __eq__(self, other):
-            if isinstance(other, Evaluate.StraightFlush):
-                return self.cards == other.cards
-            return False
+        @staticmethod
+        def FromRanks(ranks, all_cards):
+            if ranks[0] == 14:
+                return Evaluate.RoyalFlush.FromRanks(ranks, all_cards)
+            return Evaluate.StraightFlush(Evaluate.GetStraightCards(Evaluate.GetFlushCards(all_cards), ranks[0]))
 
         @staticmethod
         def IsStraightFlush(comm_cards, hand):
@@ -249,10 +867,12 @@ class Evaluate:
             return False
 
     class Quads(PokerHand):
+        __slots__ = ("quad_cards", "kicker_card")
+        value = 8
+
         def __init__(self, quad_cards, kicker_card):
             self.quad_cards = quad_cards
             self.kicker_card = kicker_card
-            self.value = 8
 
         def __repr__(self):
             return f"{''.join([x.display for x in self.quad_cards])}+{self.kicker_card}"
@@ -260,22 +880,14 @@ class Evaluate:
         def GetName(self):
             return f"{self.quad_cards[0].rank} Quads + {self.kicker_card.rank}"
 
-        def __gt__(self, other):
-            if isinstance(other, Evaluate.PokerHand):
-                if isinstance(other, Evaluate.Quads):
-                    if self.quad_cards[0].value == other.quad_cards[0].value:
-                        return self.kicker_card.value > other.kicker_card.value
-                    else:
-                        return self.quad_cards[0].value > other.quad_cards[0].value
-                else:
-                    return self.value > other.value
-            return False
+        def GetKey(self):
+            return 8, (self.quad_cards[0].value, self.kicker_card.value)
 
-        def __eq__(self, other):
-            if isinstance(other, Evaluate.Quads):
-                return self.quad_cards[0].value == other.quad_cards[0].value \
-                       and self.kicker_card.value == other.kicker_card.value
-            return False
+        @staticmethod
+        def FromRanks(ranks, all_cards):
+            quad_cards = [x for x in all_cards if x.value == ranks[0]]
+            kicker_card = next(x for x in all_cards if x.value == ranks[1])
+            return Evaluate.Quads(quad_cards, kicker_card)
 
         @staticmethod
         def IsQuads(comm_cards, hand):
@@ -290,35 +902,29 @@ class Evaluate:
             return False
 
     class FullHouse(PokerHand):
+        __slots__ = ("threeofkind", "pair")
+        value = 7
+
         def __init__(self, threeofkind, pair):
             self.threeofkind = threeofkind
             self.pair = pair
-            self.value = 7
 
         def __repr__(self):
             cards = self.threeofkind+self.pair
             return "".join([x.display for x in cards])
 
-        def __gt__(self, other):
-            if isinstance(other, Evaluate.PokerHand):
-                if isinstance(other, Evaluate.FullHouse):
-                    if self.threeofkind[0].value == other.threeofkind[0].value:
-                        return self.pair[0].value > other.pair[0].value
-                    else:
-                        return self.threeofkind[0].value > other.threeofkind[0].value
-                else:
-                    return self.value > other.value
-            return False
-
-        def __eq__(self, other):
-            if isinstance(other, Evaluate.FullHouse):
-                return self.threeofkind[0].value == other.threeofkind[0].value \
-                       and self.pair[0].value == other.pair[0].value
-            return False
+        def GetKey(self):
+            return 7, (self.threeofkind[0].value, self.pair[0].value)
 
         def GetName(self):
             return f"{self.threeofkind[0].rank} {self.pair[0].rank} FullHouse"
 
+        @staticmethod
+        def FromRanks(ranks, all_cards):
+            three_cards = [x for x in all_cards if x.value == ranks[0]]
+            pair_cards = [x for x in all_cards if x.value == ranks[1]][:2]
+            return Evaluate.FullHouse(three_cards, pair_cards)
+
         @staticmethod
         def IsFullHouse(comm_cards, hand):
             all_cards = sorted(comm_cards.cards+hand.cards, key=lambda x: x.value, reverse=True)
@@ -335,34 +941,24 @@ class Evaluate:
             return False
 
     class Flush(PokerHand):
+        __slots__ = ("cards", "high", "suit")
+        value = 6
+
         def __init__(self, cards, high):
             self.cards = cards
             self.high = high
             self.suit = high.suit
-            self.value = 6
 
         def GetName(self):
             return f"{self.high.rank} high Flush + {''.join([x.rank for x in self.cards[1:5]])}"
 
-        def __gt__(self, other):
-            if isinstance(other, Evaluate.PokerHand):
-                if isinstance(other, Evaluate.Flush):
-                    hand_cards_values = [x.value for x in self.cards]
-                    other_cards_values = [x.value for x in other.cards]
-                    for i in range(len(self.cards)):
-                        if hand_cards_values[i] > other_cards_values[i]:
-                            return True
-                        elif hand_cards_values[i] < other_cards_values[i]:
-                            return False
-                    return False
-                else:
-                    return self.value > other.value
-            return False
+        def GetKey(self):
+            return 6, tuple(x.value for x in self.cards[:5])
 
-        def __eq__(self, other):
-            if isinstance(other, Evaluate.Flush):
-                return [x.value for x in self.cards[:5]] == [x.value for x in other.cards[:5]]
-            return False
+        @staticmethod
+        def FromRanks(ranks, all_cards):
+            cards_in_flush = Evaluate.GetFlushCards(all_cards)[:5]
+            return Evaluate.Flush(cards_in_flush, cards_in_flush[0])
 
         @staticmethod
         def IsFlush(comm_cards, hand):
@@ -378,27 +974,24 @@ class Evaluate:
             return False
 
     class Straight(PokerHand):
+        __slots__ = ("cards", "high")
+        value = 5
+
         def __init__(self, cards, high):
             self.cards = cards
             self.high = high
-            self.value = 5
 
-        def __gt__(self, other):
-            if isinstance(other, Evaluate.PokerHand):
-                if isinstance(other, Evaluate.Straight):
-                    return self.high.value > other.high.value
-                else:
-                    return self.value > other.value
-            return False
-
-        def __eq__(self, other):
-            if isinstance(other, Evaluate.Straight):
-                return self.high.value == other.high.value
-            return False
+        def GetKey(self):
+            return 5, (self.high.value,)
 
         def GetName(self):
             return f"{self.high.rank} high Straight"
 
+        @staticmethod
+        def FromRanks(ranks, all_cards):
+            cards = Evaluate.GetStraightCards(all_cards, ranks[0])
+            return Evaluate.Straight(cards, cards[-1] if ranks[0] == 5 else cards[0])
+
         @staticmethod
         def IsStraight(comm_cards, hand=None):
             if hand is None:
@@ -443,37 +1036,28 @@ class Evaluate:
             return False
 
     class ThreeOfKind(PokerHand):
+        __slots__ = ("three_cards", "kicker_cards")
+        value = 4
+
         def __init__(self, three_cards, kicker_cards):
             self.three_cards = three_cards
             self.kicker_cards = kicker_cards
-            self.value = 4
 
         def __repr__(self):
             return f"{''.join([x.display for x in self.three_cards])}+{''.join([x.display for x in self.kicker_cards])}"
 
-        def __gt__(self, other):
-            if isinstance(other, Evaluate.PokerHand):
-                if isinstance(other, Evaluate.ThreeOfKind):
-                    if self.three_cards[0].value == other.three_cards[0].value:
-                        if self.kicker_cards[0].value == other.kicker_cards[0].value:
-                            return self.kicker_cards[1].value > other.kicker_cards[1].value
-                        else:
-                            return self.kicker_cards[0].value > other.kicker_cards[0].value
-                    else:
-                        return self.three_cards[0].value > other.three_cards[0].value
-                else:
-                    return self.value > other.value
-            return False
-
-        def __eq__(self, other):
-            if isinstance(other, Evaluate.ThreeOfKind):
-                return self.three_cards[0].value == other.three_cards[0].value and \
-                       [x.value for x in self.kicker_cards] == [x.value for x in other.kicker_cards]
-            return False
+        def GetKey(self):
+            return 4, (self.three_cards[0].value,) + tuple(x.value for x in self.kicker_cards)
 
         def GetName(self):
             return f"{self.three_cards[0].rank} Three of a kind + {''.join([x.rank for x in self.kicker_cards])}"
 
+        @staticmethod
+        def FromRanks(ranks, all_cards):
+            three_cards = [x for x in all_cards if x.value == ranks[0]]
+            kicker_cards = [next(x for x in all_cards if x.value == value) for value in ranks[1:]]
+            return Evaluate.ThreeOfKind(three_cards, kicker_cards)
+
         @staticmethod
         def IsThreeOfKind(comm_cards, hand):
             all_cards = comm_cards.cards+hand.cards
@@ -487,38 +1071,30 @@ class Evaluate:
             return False
 
     class TwoPair(PokerHand):
+        __slots__ = ("pair1", "pair2", "kicker")
+        value = 3
+
         def __init__(self, pair1, pair2, kicker):
             self.pair1 = pair1
             self.pair2 = pair2
             self.kicker = kicker
-            self.value = 3
 
         def __repr__(self):
             return ''.join([x.display for x in self.pair1])+''.join([x.display for x in self.pair2])+"+"+str(self.kicker)
 
-        def __gt__(self, other):
-            if isinstance(other, Evaluate.PokerHand):
-                if isinstance(other, Evaluate.TwoPair):
-                    if self.pair1[0].value == other.pair1[0].value:
-                        if self.pair2[0].value == other.pair2[0].value:
-                            return self.kicker.value > other.kicker.value
-                        else:
-                            return self.pair2[0].value > other.pair2[0].value
-                    else:
-                        return self.pair1[0].value > other.pair1[0].value
-                else:
-                    return self.value > other.value
-            return False
-
-        def __eq__(self, other):
-            if isinstance(other, Evaluate.TwoPair):
-                return self.pair1[0].value == other.pair1[0].value and self.pair2[0].value == other.pair2[0].value \
-                       and self.kicker == other.kicker
-            return False
+        def GetKey(self):
+            return 3, (self.pair1[0].value, self.pair2[0].value, self.kicker.value)
 
         def GetName(self):
             return f"{self.pair1[0].rank} {self.pair2[0].rank} Two Pair + {self.kicker.rank}"
 
+        @staticmethod
+        def FromRanks(ranks, all_cards):
+            pair1 = [x for x in all_cards if x.value == ranks[0]]
+            pair2 = [x for x in all_cards if x.value == ranks[1]]
+            kicker = next(x for x in all_cards if x.value == ranks[2])
+            return Evaluate.TwoPair(pair1, pair2, kicker)
+
         @staticmethod
         def IsTwoPair(comm_cards, hand):
             all_cards = sorted(comm_cards.cards+hand.cards, key=lambda x: x.value, reverse=True)
@@ -536,41 +1112,28 @@ class Evaluate:
             return False
 
     class Pair(PokerHand):
+        __slots__ = ("pair", "kicker_cards")
+        value = 2
+
         def __init__(self, pair, kicker_cards):
             self.pair = pair
             self.kicker_cards = kicker_cards
-            self.value = 2
 
         def __repr__(self):
             return "".join([x.display for x in self.pair])+"+"+"".join([x.display for x in self.kicker_cards])
 
-        def __gt__(self, other):
-            if isinstance(other, Evaluate.PokerHand):
-                if isinstance(other, Evaluate.Pair):
-                    if self.pair[0].value == other.pair[0].value:
-                        hand_cards_values = [x.value for x in self.kicker_cards]
-                        other_cards_values = [x.value for x in other.kicker_cards]
-                        for i in range(len(self.kicker_cards)):
-                            if hand_cards_values[i] > other_cards_values[i]:
-                                return True
-                            elif hand_cards_values[i] < other_cards_values[i]:
-                                return False
-                        return False
-                    else:
-                        return self.pair[0].value > other.pair[0].value
-                else:
-                    return self.value > other.value
-            return False
-
-        def __eq__(self, other):
-            if isinstance(other, Evaluate.Pair):
-                return self.pair[0].value == other.pair[0].value \
-                       and [x.value for x in self.kicker_cards] == [x.value for x in other.kicker_cards]
-            return False
+        def GetKey(self):
+            return 2, (self.pair[0].value,) + tuple(x.value for x in self.kicker_cards)
 
         def GetName(self):
             return f"{self.pair[0].rank} Pair + {''.join([x.rank for x in self.kicker_cards])}"
 
+        @staticmethod
+        def FromRanks(ranks, all_cards):
+            pair = [x for x in all_cards if x.value == ranks[0]]
+            kicker_cards = [next(x for x in all_cards if x.value == value) for value in ranks[1:]]
+            return Evaluate.Pair(pair, kicker_cards)
+
         @staticmethod
         def IsPair(comm_cards, hand):
             all_cards = sorted(comm_cards.cards+hand.cards, key=lambda x: x.value, reverse=True)
@@ -583,31 +1146,16 @@ class Evaluate:
             return False
 
     class High(PokerHand):
+        __slots__ = ("cards", "high", "kicker_cards")
+        value = 1
+
         def __init__(self, high, kicker_cards):
             self.cards = [high]+kicker_cards
             self.high = high
             self.kicker_cards = kicker_cards
-            self.value = 1
-
-        def __gt__(self, other):
-            if isinstance(other, Evaluate.PokerHand):
-                if isinstance(other, Evaluate.High):
-                    hand_cards_values = [x.value for x in self.cards]
-                    other_cards_values = [x.value for x in other.cards]
-                    for i in range(len(self.cards)):
-                        if hand_cards_values[i] > other_cards_values[i]:
-                            return True
-                        elif hand_cards_values[i] < other_cards_values[i]:
-                            return False
-                    return False
-                else:
-                    return self.value > other.value
-            return False
 
-        def __eq__(self, other):
-            if isinstance(other, Evaluate.High):
-                return [x.value for x in self.cards] == [x.value for x in other.cards]
-            return False
+        def GetKey(self):
+            return 1, tuple(x.value for x in self.cards)
 
         def __repr__(self):
             return str(self.high)+"+"+"".join([x.display for x in self.kicker_cards])
@@ -615,6 +1163,11 @@ class Evaluate:
         def GetName(self):
             return f"{self.high.rank} High + {''.join([x.rank for x in self.kicker_cards])}"
 
+        @staticmethod
+        def FromRanks(ranks, all_cards):
+            cards = [next(x for x in all_cards if x.value == value) for value in ranks]
+            return Evaluate.High(cards[0], cards[1:])
+
         @staticmethod
         def IsHigh(comm_cards, hand):
             all_cards = sorted(comm_cards.cards+hand.cards, key=lambda x: x.value, reverse=True)
@@ -622,11 +1175,522 @@ class Evaluate:
             kicker_cards = all_cards[1:5]
             return Evaluate.High(high, kicker_cards)
 
+    CATEGORIES = {1: High, 2: Pair, 3: TwoPair, 4: ThreeOfKind, 5: Straight,
+                  6: Flush, 7: FullHouse, 8: Quads, 9: StraightFlush}
+
+
+class LookupTable:
+    PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+    CARD_PRIMES = PRIMES * 4
+    CARD_BITS = [1 << x for x in range(13)] * 4
+    STRAIGHTS = [(high, 0x1F << (high - 6)) for high in range(14, 5, -1)] + [(5, 0x100F)]
+
+    keys = None
+    strengths = None
+    flushes = None
+    rank_products = None
+    mask_products = None
+    arrays = None
+
+    @staticmethod
+    def GenerateStrengths():
+        if LookupTable.strengths is not None:
+            return
+        keys = LookupTable.GenerateKeys()
+        LookupTable.strengths = {key: strength for strength, key in enumerate(keys) if key is not None}
+        LookupTable.keys = keys
+
+    @staticmethod
+    def Generate():
+        if LookupTable.flushes is not None:
+            return
+        LookupTable.GenerateStrengths()
+        strengths = LookupTable.strengths
+
+        flushes = [0] * (1 << 13)
+        mask_products = [1] * (1 << 13)
+        for mask in range(1 << 13):
+            values = [rank + 2 for rank in range(12, -1, -1) if mask >> rank & 1]
+            for value in values:
+                mask_products[mask] *= LookupTable.PRIMES[value - 2]
+            if len(values) < 5:
+                continue
+            high = LookupTable.GetStraightHigh(mask)
+            if high:
+                flushes[mask] = strengths[(9, (high,))]
+            else:
+                flushes[mask] = strengths[(6, tuple(values[:5]))]
+
+        rank_products = {}
+        for size in (5, 6, 7):
+            for ranks in combinations_with_replacement(range(13), size):
+                counts = [0] * 15
+                product = 1
+                for rank in ranks:
+                    counts[rank + 2] += 1
+                    product *= LookupTable.PRIMES[rank]
+                if max(counts) > 4:
+                    continue
+                rank_products[product] = strengths[LookupTable.GetRankKey(counts)]
+
+        LookupTable.rank_products = rank_products
+        LookupTable.mask_products = mask_products
+        LookupTable.flushes = flushes
+
+    @staticmethod
+    def GenerateKeys():
+        values = range(14, 1, -1)
+        straights = {frozenset([14, 2, 3, 4, 5] if high == 5 else range(high - 4, high + 1))
+                     for high in range(5, 15)}
+        keys = []
+        for ranks in combinations(values, 5):
+            if frozenset(ranks) not in straights:
+                keys.append((1, ranks))
+                keys.append((6, ranks))
+        for high in range(5, 15):
+            keys.append((5, (high,)))
+            keys.append((9, (high,)))
+        for value in values:
+            others = [x for x in values if x != value]
+            for kickers in combinations(others, 3):
+                keys.append((2, (value,) + kickers))
+            for kickers in combinations(others, 2):
+                keys.append((4, (value,) + kickers))
+            for other in others:
+                keys.append((7, (value, other)))
+                keys.append((8, (value, other)))
+        for pair1, pair2 in combinations(values, 2):
+            for kicker in values:
+                if kicker != pair1 and kicker != pair2:
+                    keys.append((3, (pair1, pair2, kicker)))
+        keys.sort()
+        return [None] + keys
+
+    @staticmethod
+    def GetStraightHigh(mask):
+        for high, straight in LookupTable.STRAIGHTS:
+            if mask & straight == straight:
+                return high
+        return 0
+
+    @staticmethod
+    def GetRankKey(counts):
+        groups = [[], [], [], [], []]
+        mask = 0
+        for value in range(14, 1, -1):
+            if counts[value]:
+                groups[counts[value]].append(value)
+                mask |= 1 << (value - 2)
+        singles, pairs, threes, quads = groups[1], groups[2], groups[3], groups[4]
+        if quads:
+            return 8, (quads[0], max(quads[1:] + threes + pairs + singles))
+        if threes and len(threes) + len(pairs) > 1:
+            return 7, (threes[0], max(threes[1:] + pairs))
+        high = LookupTable.GetStraightHigh(mask)
+        if high:
+            return 5, (high,)
+        if threes:
+            return 4, (threes[0],) + tuple(singles[:2])
+        if len(pairs) > 1:
+            return 3, (pairs[0], pairs[1], max(pairs[2:] + singles))
+        if pairs:
+            return 2, (pairs[0],) + tuple(singles[:3])
+        return 1, tuple(singles[:5])
+
+    @staticmethod
+    def GetStrength(cards):
+        if LookupTable.flushes is None:
+            LookupTable.Generate()
+        masks = [0, 0, 0, 0]
+        product = 1
+        for card in cards:
+            product *= LookupTable.CARD_PRIMES[card.index]
+            masks[card.index // 13] |= LookupTable.CARD_BITS[card.index]
+        return LookupTable.Lookup(product, masks)
+
+    @staticmethod
+    def GetArrays():
+        if np is None:
+            raise ImportError("NumPy is required for batch evaluation!")
+        if LookupTable.arrays is None:
+            LookupTable.Generate()
+            products = np.array(sorted(LookupTable.rank_products), dtype=np.int64)
+            strengths = np.array([LookupTable.rank_products[x] for x in products.tolist()], dtype=np.int32)
+            LookupTable.arrays = {
+                "primes": np.array(LookupTable.CARD_PRIMES, dtype=np.int64),
+                "bits": np.array(LookupTable.CARD_BITS, dtype=np.int64),
+                "flushes": np.array(LookupTable.flushes, dtype=np.int32),
+                "products": products,
+                "strengths": strengths,
+            }
+        return LookupTable.arrays
+
+    @staticmethod
+    def GetBatchStrengths(cards):
+        arrays = LookupTable.GetArrays()
+        cards = np.asarray(cards, dtype=np.int64)
+        if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+            raise ValueError("Batch cards should have a shape of (N, 5), (N, 6) or (N, 7)!")
+        if cards.size and (cards.min() < 0 or cards.max() > 51):
+            raise ValueError("Card indices should be between 0 and 51!")
+        if (np.diff(np.sort(cards, axis=1), axis=1) == 0).any():
+            raise ValueError("The same card can't be in a row more than once!")
+        suits = cards // 13
+        bits = arrays["bits"][cards]
+        flush_strengths = np.zeros(len(cards), dtype=np.int32)
+        for suit in range(4):
+            suit_masks = np.where(suits == suit, bits, 0).sum(axis=1)
+            flush_strengths = np.maximum(flush_strengths, arrays["flushes"][suit_masks])
+        products = arrays["primes"][cards].prod(axis=1)
+        positions = np.searchsorted(arrays["products"], products)
+        rank_strengths = arrays["strengths"][np.minimum(positions, len(arrays["products"]) - 1)]
+        return np.where(flush_strengths > 0, flush_strengths, rank_strengths)
+
+    @staticmethod
+    def GetMaskStrength(mask):
+        if LookupTable.flushes is None:
+            LookupTable.Generate()
+        masks = [mask & 0x1FFF, mask >> 13 & 0x1FFF, mask >> 26 & 0x1FFF, mask >> 39]
+        products = LookupTable.mask_products
+        return LookupTable.Lookup(products[masks[0]] * products[masks[1]] * products[masks[2]] * products[masks[3]],
+                                  masks)
+
+    @staticmethod
+    def Lookup(product, masks):
+        for mask in masks:
+            strength = LookupTable.flushes[mask]
+            if strength:
+                return strength
+        return LookupTable.rank_products[product]
+
+
+class Isomorphism:
+    PERMUTATIONS = list(permutations(range(4)))
+
+    @staticmethod
+    def PermuteMask(mask, permutation):
+        result = 0
+        for suit in range(4):
+            result |= (mask >> 13 * suit & 0x1FFF) << 13 * permutation[suit]
+        return result
+
+    @staticmethod
+    def CanonicalizeMasks(masks):
+        images = {tuple([Isomorphism.PermuteMask(x, permutation) for x in masks])
+                  for permutation in Isomorphism.PERMUTATIONS}
+        return min(images), len(images)
+
+    @staticmethod
+    def GetStreetMasks(comm_cards):
+        cards = comm_cards.cards if comm_cards is not None else []
+        return [CardSet(cards[:3]).mask] + [CardSet([x]).mask for x in cards[3:]]
+
+    @staticmethod
+    def Canonicalize(hand, comm_cards=None):
+        hands, comm_cards, multiplicity = Isomorphism.CanonicalizeHands([hand], comm_cards)
+        return hands[0], comm_cards, multiplicity
+
+    @staticmethod
+    def CanonicalizeHands(hands, comm_cards=None):
+        masks = [CardSet(x.cards).mask for x in hands] + Isomorphism.GetStreetMasks(comm_cards)
+        canonical, multiplicity = Isomorphism.CanonicalizeMasks(masks)
+        canonical_hands = [Hand(list(CardSet.FromMask(x))) for x in canonical[:len(hands)]]
+        board_cards = [x for mask in canonical[len(hands):] for x in CardSet.FromMask(mask)]
+        return canonical_hands, CommunityCards(board_cards), multiplicity
+
+    @staticmethod
+    def GetKey(hands, comm_cards=None):
+        masks = [CardSet(x.cards).mask for x in hands] + Isomorphism.GetStreetMasks(comm_cards)
+        return Isomorphism.CanonicalizeMasks(masks)[0]
+
+
+class CardCombinations:
+
+    @staticmethod
+    def GetLiveBits(dead_mask=0):
+        return [1 << x for x in range(52) if not dead_mask >> x & 1]
+
+    @staticmethod
+    def Count(k, dead_mask=0):
+        return comb(52 - bin(dead_mask & CardSet.FULL).count("1"), k)
+
+    @staticmethod
+    def GetMasks(k, dead_mask=0):
+        for mask, removed, added in CardCombinations.GetDeltas(k, dead_mask):
+            yield mask
+
+    @staticmethod
+    def GetDeltas(k, dead_mask=0):
+        live_bits = CardCombinations.GetLiveBits(dead_mask)
+        n = len(live_bits)
+        if k < 0 or k > n:
+            return
+        positions = list(range(k)) + [n]
+        mask = 0
+        for bit in live_bits[:k]:
+            mask |= bit
+        yield mask, 0, mask
+        while True:
+            if k and positions[0] + 1 < positions[1]:
+                removed = live_bits[positions[0]]
+                positions[0] += 1
+                added = live_bits[positions[0]]
+            else:
+                j = 0
+                while j < k and positions[j] + 1 == positions[j + 1]:
+                    j += 1
+                if j == k:
+                    return
+                old = 0
+                for i in range(j + 1):
+                    old |= live_bits[positions[i]]
+                positions[j] += 1
+                new = live_bits[positions[j]]
+                for i in range(j):
+                    positions[i] = i
+                    new |= live_bits[i]
+                removed, added = old & ~new, new & ~old
+            mask ^= removed | added
+            yield mask, removed, added
+
+
+class NutRanking:
+    cache = EvalCache(256)
+
+    def __init__(self, comm_cards, dead_cards=None):
+        board_cards = comm_cards.cards
+        if not 3 <= len(board_cards) <= 5:
+            raise ValueError("Nut ranking needs a flop, turn or river!")
+        self.board_mask = CardSet(board_cards).mask
+        self.dead_mask = CardSet(dead_cards or []).mask
+        if self.board_mask & self.dead_mask or len(dead_cards or []) != bin(self.dead_mask).count("1"):
+            raise ValueError("The same card can't be in more than one place!")
+        LookupTable.Generate()
+        combos = [(LookupTable.GetMaskStrength(self.board_mask | x), x)
+                  for x in CardCombinations.GetMasks(2, self.board_mask | self.dead_mask)]
+        combos.sort(reverse=True)
+        self.masks = [x[1] for x in combos]
+        self.strengths = [x[0] for x in combos]
+        self.groups = []
+        self.ranks = {}
+        for strength, mask in combos:
+            if strength not in self.ranks:
+                self.ranks[strength] = len(self.groups)
+                self.groups.append([])
+            self.groups[-1].append(mask)
+        self.counts = None
+
+    def __repr__(self):
+        return f"{CommunityCards.FromCardSet(CardSet.FromMask(self.board_mask))}: {len(self.masks)} combos"
+
+    def __len__(self):
+        return len(self.masks)
+
+    @staticmethod
+    def Get(comm_cards, dead_cards=None):
+        key = (CardSet(comm_cards.cards).mask, CardSet(dead_cards or []).mask)
+        ranking = NutRanking.cache.Get(key)
+        if ranking is None:
+            ranking = NutRanking(comm_cards, dead_cards)
+            NutRanking.cache.Put(key, ranking)
+        return ranking
+
+    @staticmethod
+    def Percentile(hand, comm_cards, dead_cards=None):
+        return NutRanking.Get(comm_cards, dead_cards).GetPercentile(hand)
+
+    def GetHands(self):
+        return [[Hand(list(CardSet.FromMask(x))) for x in group] for group in self.groups]
+
+    def GetNuts(self):
+        return [Hand(list(CardSet.FromMask(x))) for x in self.groups[0]]
+
+    def GetStrength(self, hand):
+        mask = CardSet(hand.cards).mask
+        if len(hand.cards) != 2 or bin(mask).count("1") != 2 or mask & (self.board_mask | self.dead_mask):
+            raise ValueError(f"{hand} is not a live combo on this board!")
+        return LookupTable.GetMaskStrength(self.board_mask | mask)
+
+    def GetRank(self, hand):
+        return self.ranks[self.GetStrength(hand)]
+
+    def GetPercentile(self, hand):
+        strength = self.GetStrength(hand)
+        if self.counts is None:
+            self.counts = Equity.GetStrengthGroups([(x, 1, y) for x, y in zip(self.masks, self.strengths)])
+        less, equal, total = Equity.CountVersus(*self.counts, CardSet(hand.cards).mask, strength)
+        return (less + equal / 2) / total
+
+
+class HandPotential:
+    cache = EvalCache(10000)
+
+    def __init__(self, hs, ppot, npot, exact=True, samples=0):
+        self.hs = hs
+        self.ppot = ppot
+        self.npot = npot
+        self.ehs = hs * (1 - npot) + (1 - hs) * ppot
+        self.exact = exact
+        self.samples = samples
+
+    def __repr__(self):
+        return f"HS: {self.hs:.4f}, PPot: {self.ppot:.4f}, NPot: {self.npot:.4f}, EHS: {self.ehs:.4f}"
+
+    @staticmethod
+    def Calculate(hand, comm_cards, iterations=None, seed=None):
+        if len(hand.cards) != 2:
+            raise ValueError("Hand potential needs exactly two hole cards!")
+        ranking = NutRanking.Get(comm_cards)
+        hs = ranking.GetPercentile(hand)
+        if iterations is not None and seed is None:
+            return HandPotential.Compute(ranking, hand, hs, iterations, seed)
+        key = (Isomorphism.GetKey([hand], comm_cards), iterations, seed)
+        potential = HandPotential.cache.Get(key)
+        if potential is None:
+            potential = HandPotential.Compute(ranking, hand, hs, iterations, seed)
+            HandPotential.cache.Put(key, potential)
+        return potential
+
+    @staticmethod
+    def Compute(ranking, hand, hs, iterations=None, seed=None):
+        hand_mask = CardSet(hand.cards).mask
+        board_mask = ranking.board_mask
+        strength = LookupTable.GetMaskStrength(board_mask | hand_mask)
+        opponents = [(mask, 0 if strength > x else 1 if strength == x else 2)
+                     for mask, x in zip(ranking.masks, ranking.strengths) if not mask & hand_mask]
+        missing = 5 - bin(board_mask).count("1")
+        if not missing:
+            return HandPotential(hs, 0.0, 0.0)
+        live_bits = CardCombinations.GetLiveBits(board_mask | hand_mask)
+        potentials = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+        if iterations is None:
+            for runout_mask in CardCombinations.GetMasks(missing, board_mask | hand_mask):
+                runout_mask |= board_mask
+                final = LookupTable.GetMaskStrength(runout_mask | hand_mask)
+                for mask, state in opponents:
+                    if mask & runout_mask:
+                        continue
+                    opponent = LookupTable.GetMaskStrength(runout_mask | mask)
+                    potentials[state][0 if final > opponent else 1 if final == opponent else 2] += 1
+        else:
+            rng = random.Random(seed)
+            for i in range(iterations):
+                mask, state = rng.choice(opponents)
+                runout_mask = board_mask
+                for bit in rng.sample(live_bits, missing + 2):
+                    if bin(runout_mask).count("1") == 5:
+                        break
+                    if not bit & mask:
+                        runout_mask |= bit
+                final = LookupTable.GetMaskStrength(runout_mask | hand_mask)
+                opponent = LookupTable.GetMaskStrength(runout_mask | mask)
+                potentials[state][0 if final > opponent else 1 if final == opponent else 2] += 1
+        ahead, tied, behind = [sum(x) for x in potentials]
+        ppot_total = behind + tied / 2
+        npot_total = ahead + tied / 2
+        ppot = (potentials[2][0] + potentials[2][1] / 2 + potentials[1][0] / 2) / ppot_total if ppot_total else 0.0
+        npot = (potentials[0][2] + potentials[1][2] / 2 + potentials[0][1] / 2) / npot_total if npot_total else 0.0
+        return HandPotential(hs, ppot, npot, iterations is None, iterations or 0)
+
+
+class OutsResult:
+    def __init__(self, category, leading, cards, outs, runner_runner, probability, lead_probability=None):
+        self.category = category
+        self.leading = leading
+        self.cards = cards
+        self.outs = outs
+        self.runner_runner = runner_runner
+        self.probability = probability
+        self.lead_probability = lead_probability
+
+    def __repr__(self):
+        groups = [f"{Evaluate.CATEGORIES[category].__name__}: {''.join([x.display for x in cards])}"
+                  for category, cards in sorted(self.outs.items(), reverse=True)]
+        result = f"{', '.join(groups) or 'No outs'} ({self.probability:.4f})"
+        if self.leading is not None:
+            result += f", takes lead: {''.join([x.display for x in self.GetLeadOuts()]) or 'none'}"
+        return result
+
+    def __len__(self):
+        return sum(len(x) for x in self.outs.values())
+
+    def GetOuts(self):
+        return [card for card, category, improves, takes_lead in self.cards if improves]
+
+    def GetLeadOuts(self):
+        return [card for card, category, improves, takes_lead in self.cards if takes_lead]
+
+
+class Outs:
+
+    @staticmethod
+    def Calculate(hand, comm_cards, opponents=None):
+        if len(comm_cards.cards) not in (3, 4):
+            raise ValueError("Outs can only be calculated on the flop or the turn!")
+        opponents = opponents or []
+        hand_masks, board_mask, known_mask = Equity.GetMasks([hand] + opponents, comm_cards)
+        hand_mask, opponent_masks = hand_masks[0], hand_masks[1:]
+        LookupTable.Generate()
+        keys = LookupTable.keys
+
+        def Score(runout_mask):
+            strength = LookupTable.GetMaskStrength(runout_mask | hand_mask)
+            improves = keys[strength][0] > category and Outs.IsImprovedOverBoard(strength, runout_mask)
+            if not opponent_masks:
+                return strength, improves, None
+            return strength, improves, strength > max(LookupTable.GetMaskStrength(runout_mask | x)
+                                                      for x in opponent_masks)
+
+        category = keys[LookupTable.GetMaskStrength(board_mask | hand_mask)][0]
+        leading = Score(board_mask)[2]
+        cards = []
+        outs = {}
+        out_mask = 0
+        ahead_cards = 0
+        for bit in CardCombinations.GetLiveBits(known_mask):
+            strength, improves, ahead = Score(board_mask | bit)
+            card = Card.DECK[bit.bit_length() - 1]
+            cards.append((card, keys[strength][0], improves, None if ahead is None else ahead and not leading))
+            ahead_cards += bool(ahead)
+            if improves:
+                outs.setdefault(keys[strength][0], []).append(card)
+                out_mask |= bit
+        runner_runner = {}
+        if len(comm_cards.cards) == 4:
+            return OutsResult(category, leading, cards, outs, runner_runner, bin(out_mask).count("1") / len(cards),
+                              None if leading is None else ahead_cards / len(cards))
+        improved = 0
+        ahead_runouts = 0
+        runouts = 0
+        for runout_mask in CardCombinations.GetMasks(2, known_mask):
+            strength, improves, ahead = Score(board_mask | runout_mask)
+            runouts += 1
+            ahead_runouts += bool(ahead)
+            if not improves:
+                continue
+            improved += 1
+            if not runout_mask & out_mask:
+                low = runout_mask & -runout_mask
+                runner_runner.setdefault(keys[strength][0], []).append(
+                    (Card.DECK[low.bit_length() - 1], Card.DECK[(runout_mask ^ low).bit_length() - 1]))
+        return OutsResult(category, leading, cards, outs, runner_runner, improved / runouts,
+                          None if leading is None else ahead_runouts / runouts)
+
+    @staticmethod
+    def IsImprovedOverBoard(strength, board_mask):
+        if bin(board_mask).count("1") == 5:
+            board_category = LookupTable.keys[LookupTable.GetMaskStrength(board_mask)][0]
+        else:
+            counts = sorted([sum(board_mask >> (rank + 13 * suit) & 1 for suit in range(4)) for rank in range(13)],
+                            reverse=True)
+            board_category = {4: 8, 3: 4}.get(counts[0], 3 if counts[1] == 2 else 2 if counts[0] == 2 else 1)
+        return LookupTable.keys[strength][0] > board_category
+
 
 class Deck:
-    def __init__(self, cards=None):
+    def __init__(self, cards=None, rng=None):
+        self.rng = random if rng is None else rng
         if cards is None:
-            self.cards = []
             self.Generate()
         else:
             self.cards = cards
@@ -634,23 +1698,45 @@ class Deck:
     def __repr__(self):
         return "".join([str(x) for x in self.cards])
 
+    @property
+    def cards(self):
+        return self.pool
+
+    @cards.setter
+    def cards(self, cards):
+        self.pool = list(cards)
+        self.dealt = []
+
     def Generate(self):
-        deck = []
-        suits = ["h", "d", "s", "c"]
-        ranks = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+        self.cards = Card.DECK
 
-        for suit in suits:
-            for rank in ranks:
-                deck.append(Card(rank + suit))
-        self.cards = deck
+    @staticmethod
+    def FromCardSet(card_set):
+        return Deck(list(card_set))
+
+    def GetCardSet(self):
+        return CardSet(self.pool)
 
     def GetCard(self):
-        if len(self.cards) == 0:
+        pool = self.pool
+        if not pool:
             raise Exception("Can't get a card, because the deck is empty")
-        random_number = random.randint(0, len(self.cards)-1)
-        random_card = self.cards[random_number]
-        del self.cards[random_number]
-        return random_card
+        i = self.rng.randrange(len(pool))
+        pool[i], pool[-1] = pool[-1], pool[i]
+        card = pool.pop()
+        self.dealt.append(card)
+        return card
+
+    def RemoveCards(self, cards):
+        for card in cards:
+            for x in (self.pool, self.dealt):
+                if card in x:
+                    x.remove(card)
+                    break
+
+    def Reset(self):
+        self.pool += self.dealt
+        self.dealt = []
 
 
 def GetRandomCommunityCards(deck):
@@ -661,47 +1747,1001 @@ def GetRandomCommunityCards(deck):
     return comm_cards
 
 
-def asd(card_list):
-    comm_cards_cards = [Card(x) for x in card_list[4:]]
-    comm_cards = CommunityCards(comm_cards_cards)
-    print("Comm: "+str(comm_cards))
+class Range:
+    RANK_CHARS = "23456789TJQKA"
+    CLASS_PATTERN = re.compile(r"^([2-9TJQKA])([2-9TJQKA])([so]?)(\+?)$")
+    DASH_PATTERN = re.compile(r"^([2-9TJQKA])([2-9TJQKA])([so]?)-([2-9TJQKA])([2-9TJQKA])([so]?)$")
+    COMBO_PATTERN = re.compile(r"^([2-9TJQKA][hdsc])([2-9TJQKA][hdsc])$")
+
+    def __init__(self, combos=None, range_string=None):
+        self.combos = {} if combos is None else combos
+        self.range_string = range_string
+
+    def __repr__(self):
+        if self.range_string is not None:
+            return self.range_string
+        return ",".join([f"{Hand(list(CardSet.FromMask(x)))}" for x in self.combos])
+
+    def __len__(self):
+        return len(self.combos)
+
+    @staticmethod
+    def Parse(range_string):
+        range_obj = Range(range_string=range_string)
+        for token in range_string.split(","):
+            token = token.strip()
+            if not token:
+                continue
+            weight = 1.0
+            if ":" in token:
+                token, weight_string = token.split(":", 1)
+                try:
+                    weight = float(weight_string)
+                except ValueError:
+                    raise PokerExceptions.IncorrectRangeString(f"Cannot parse the weight of {token}")
+            token = token.replace("10", "T")
+            for mask in Range.ParseToken(token):
+                range_obj.combos[mask] = weight
+        return range_obj
+
+    @staticmethod
+    def ParseToken(token):
+        normalized = "".join([x.upper() if x.upper() in Range.RANK_CHARS else x.lower() for x in token])
+        match = Range.COMBO_PATTERN.match(normalized)
+        if match:
+            cards = [Card(x.replace("T", "10")) for x in match.groups()]
+            if cards[0] == cards[1]:
+                raise PokerExceptions.IncorrectRangeString(f"Cannot parse {token}")
+            return [CardSet(cards).mask]
+        match = Range.CLASS_PATTERN.match(normalized)
+        if match:
+            high, low = Range.RANK_CHARS.index(match.group(1)), Range.RANK_CHARS.index(match.group(2))
+            if high == low:
+                lows = range(low, 13) if match.group(4) else [low]
+                return [x for rank in lows for x in Range.GetClassMasks(rank, rank, "")]
+            if high < low:
+                high, low = low, high
+            lows = range(low, high) if match.group(4) else [low]
+            return [x for rank in lows for x in Range.GetClassMasks(high, rank, match.group(3))]
+        match = Range.DASH_PATTERN.match(normalized)
+        if match:
+            start = [Range.RANK_CHARS.index(x) for x in match.group(1, 2)]
+            end = [Range.RANK_CHARS.index(x) for x in match.group(4, 5)]
+            if match.group(3) == match.group(6):
+                if start[0] == start[1] and end[0] == end[1]:
+                    ranks = range(min(start[0], end[0]), max(start[0], end[0]) + 1)
+                    return [x for rank in ranks for x in Range.GetClassMasks(rank, rank, "")]
+                if start[0] == end[0] and start[0] > max(start[1], end[1]):
+                    lows = range(min(start[1], end[1]), max(start[1], end[1]) + 1)
+                    return [x for rank in lows for x in Range.GetClassMasks(start[0], rank, match.group(3))]
+        raise PokerExceptions.IncorrectRangeString(f"Cannot parse {token}")
+
+    @staticmethod
+    def GetClassMasks(high, low, suitedness):
+        masks = []
+        for suit1 in range(4):
+            for suit2 in range(4):
+                card1, card2 = suit1 * 13 + high, suit2 * 13 + low
+                if card1 == card2 or (high == low and suit1 > suit2):
+                    continue
+                if suitedness == "s" and suit1 != suit2 or suitedness == "o" and suit1 == suit2:
+                    continue
+                masks.append(1 << card1 | 1 << card2)
+        return masks
+
+    def GetHands(self, dead_mask=0):
+        return [(Hand(list(CardSet.FromMask(mask))), weight) for mask, weight in self.combos.items()
+                if not mask & dead_mask]
+
+
+class EquityResult:
+    def __init__(self, hands, wins, ties, shares, runouts, exact=False, equities=None):
+        self.hands = hands
+        self.wins = wins
+        self.ties = ties
+        self.shares = shares
+        self.runouts = runouts
+        self.exact = exact
+        if equities is not None:
+            self.equities = equities
+        elif runouts:
+            self.equities = [(win + share) / runouts for win, share in zip(wins, shares)]
+        else:
+            self.equities = [0.0] * len(hands)
+
+    def __repr__(self):
+        return ", ".join([f"{hand}: {equity:.4f}" for hand, equity in zip(self.hands, self.equities)])
+
+    def GetEquity(self, hand):
+        for i, x in enumerate(self.hands):
+            if x is hand:
+                return self.equities[i]
+        raise ValueError(f"{hand} is not in this result!")
+
+
+class Equity:
+    EXACT_THRESHOLD = 100000
+    preflop_table = None
+
+    @staticmethod
+    def Calculate(hands, comm_cards=None, dead_cards=None, iterations=10000, workers=1, seed=None,
+                  threshold=None):
+        threshold = Equity.EXACT_THRESHOLD if threshold is None else threshold
+        table = Equity.preflop_table
+        if table is not None and table.kind == PreflopTable.COMBOS and len(hands) == 2 and not dead_cards \
+                and (comm_cards is None or not comm_cards.cards) and table.HasEquity(hands[0], hands[1]):
+            return Equity.Preflop(hands[0], hands[1])
+        if Equity.CountRunouts(hands, comm_cards, dead_cards) <= threshold:
+            return Equity.Exact(hands, comm_cards, dead_cards, workers)
+        return Equity.MonteCarlo(hands, comm_cards, dead_cards, iterations, workers, seed)
+
+    @staticmethod
+    def LoadPreflopTable(path):
+        if Equity.preflop_table is not None:
+            Equity.preflop_table.Close()
+        Equity.preflop_table = PreflopTable(path) if path else None
+        return Equity.preflop_table
+
+    @staticmethod
+    def Preflop(hand1, hand2):
+        table = Equity.preflop_table
+        if table is None:
+            raise ValueError("No preflop table is loaded!")
+        Equity.GetMasks([hand1, hand2])
+        equity = table.GetEquity(hand1, hand2)
+        # The table only stores equities, so the lookup counts as a single runout split by equity.
+        return EquityResult([hand1, hand2], [0, 0], [0, 0], [equity, 1 - equity], 1, table.IsExact())
+
+    @staticmethod
+    def RangeVsRange(range1, range2, comm_cards=None, dead_cards=None, iterations=10000, seed=None):
+        board_cards = comm_cards.cards if comm_cards is not None else []
+        board_mask = CardSet(board_cards).mask
+        known_mask = board_mask | CardSet(dead_cards or []).mask
+        combos1 = [(mask, weight) for mask, weight in range1.combos.items() if weight > 0 and not mask & known_mask]
+        combos2 = [(mask, weight) for mask, weight in range2.combos.items() if weight > 0 and not mask & known_mask]
+        if not any(not mask1 & mask2 for mask1, weight1 in combos1 for mask2, weight2 in combos2):
+            raise ValueError("The ranges have no combos that can be dealt together!")
+        LookupTable.Generate()
+        if len(board_cards) >= 3:
+            win, tie, lose = Equity.ExactRangeVsRange(combos1, combos2, board_mask, known_mask)
+        else:
+            win, tie, lose = Equity.SampleRangeVsRange(combos1, combos2, board_mask, known_mask, iterations, seed)
+        return EquityResult([range1, range2], [win, lose], [tie, tie], [tie / 2, tie / 2], win + tie + lose,
+                            len(board_cards) >= 3)
+
+    @staticmethod
+    def ExactRangeVsRange(combos1, combos2, board_mask, known_mask):
+        win, tie, lose = 0.0, 0.0, 0.0
+        for runout_mask in CardCombinations.GetMasks(5 - bin(board_mask).count("1"), known_mask):
+            runout_mask |= board_mask
+            strengths2 = [(mask, weight, LookupTable.GetMaskStrength(runout_mask | mask))
+                          for mask, weight in combos2 if not mask & runout_mask]
+            if not strengths2:
+                continue
+            groups, exact = Equity.GetStrengthGroups(strengths2)
+            for mask, weight in combos1:
+                if mask & runout_mask:
+                    continue
+                strength = LookupTable.GetMaskStrength(runout_mask | mask)
+                less, equal, total = Equity.CountVersus(groups, exact, mask, strength)
+                win += weight * less
+                tie += weight * equal
+                lose += weight * (total - less - equal)
+        return win, tie, lose
+
+    @staticmethod
+    def GetStrengthGroups(strengths):
+        members = {52: []}
+        exact = {}
+        for mask, weight, strength in strengths:
+            members[52].append((strength, weight))
+            exact[mask] = (strength, weight)
+            low = mask & -mask
+            for card in (low.bit_length() - 1, (mask ^ low).bit_length() - 1):
+                members.setdefault(card, []).append((strength, weight))
+        groups = {}
+        for key, group in members.items():
+            group.sort()
+            cumulative = [0.0]
+            for strength, weight in group:
+                cumulative.append(cumulative[-1] + weight)
+            groups[key] = ([x[0] for x in group], cumulative)
+        return groups, exact
+
+    @staticmethod
+    def CountVersus(groups, exact, mask, strength):
+        low = mask & -mask
+        less, equal, total = Equity.CountStrengths(groups[52], strength)
+        for card in (low.bit_length() - 1, (mask ^ low).bit_length() - 1):
+            if card in groups:
+                card_less, card_equal, card_total = Equity.CountStrengths(groups[card], strength)
+                less, equal, total = less - card_less, equal - card_equal, total - card_total
+        if mask in exact:
+            same_strength, same_weight = exact[mask]
+            total += same_weight
+            if same_strength < strength:
+                less += same_weight
+            elif same_strength == strength:
+                equal += same_weight
+        return less, equal, total
+
+    @staticmethod
+    def CountStrengths(group, strength):
+        strengths, cumulative = group
+        less = cumulative[bisect_left(strengths, strength)]
+        return less, cumulative[bisect_right(strengths, strength)] - less, cumulative[-1]
+
+    @staticmethod
+    def SampleRangeVsRange(combos1, combos2, board_mask, known_mask, iterations, seed):
+        rng = random.Random(seed)
+        masks1, weights1 = [x[0] for x in combos1], [x[1] for x in combos1]
+        masks2, weights2 = [x[0] for x in combos2], [x[1] for x in combos2]
+        live_bits = [1 << x for x in range(52) if not known_mask >> x & 1]
+        missing = 5 - bin(board_mask).count("1")
+        win, tie, lose = 0, 0, 0
+        while win + tie + lose < iterations:
+            mask1 = rng.choices(masks1, weights1)[0]
+            mask2 = rng.choices(masks2, weights2)[0]
+            if mask1 & mask2:
+                continue
+            runout_mask = board_mask
+            used_mask = mask1 | mask2
+            for bit in rng.sample(live_bits, missing + 4):
+                if bin(runout_mask).count("1") == 5:
+                    break
+                if not bit & used_mask:
+                    runout_mask |= bit
+            strength1 = LookupTable.GetMaskStrength(runout_mask | mask1)
+            strength2 = LookupTable.GetMaskStrength(runout_mask | mask2)
+            if strength1 > strength2:
+                win += 1
+            elif strength1 == strength2:
+                tie += 1
+            else:
+                lose += 1
+        return win, tie, lose
 
-    hand = Hand([Card(card_list[0]), Card(card_list[1])])
-    print("Hand1: "+str(hand))
-    evaled_hand = hand.Read(comm_cards)
-    print(evaled_hand.GetName())
+    @staticmethod
+    def CountRunouts(hands, comm_cards=None, dead_cards=None):
+        hand_masks, board_mask, known_mask = Equity.GetMasks(hands, comm_cards, dead_cards)
+        return CardCombinations.Count(5 - bin(board_mask).count("1"), known_mask)
+
+    @staticmethod
+    def Exact(hands, comm_cards=None, dead_cards=None, workers=1):
+        hand_masks, board_mask, known_mask = Equity.GetMasks(hands, comm_cards, dead_cards)
+        missing = 5 - bin(board_mask).count("1")
+        LookupTable.Generate()
+        if missing == 0:
+            results = [ExactWorker((hand_masks, board_mask, known_mask, 0, []))]
+        else:
+            tops = [x for x in range(52) if not known_mask >> x & 1][missing - 1:]
+            jobs = [(hand_masks, board_mask, known_mask, missing, tops[x::workers]) for x in range(workers)]
+            if workers == 1:
+                results = [ExactWorker(jobs[0])]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(ExactWorker, jobs))
+        result = Equity.Merge(hands, results)
+        result.exact = True
+        return result
+
+    @staticmethod
+    def GetMasks(hands, comm_cards=None, dead_cards=None):
+        board_cards = comm_cards.cards if comm_cards is not None else []
+        if len(board_cards) > 5:
+            raise ValueError("Community cards can't contain more than 5 cards!")
+        known_cards = board_cards + list(dead_cards or []) + [x for hand in hands for x in hand.cards]
+        if len(set(known_cards)) != len(known_cards):
+            raise ValueError("The same card can't be in more than one place!")
+        hand_masks = [CardSet(x.cards).mask for x in hands]
+        return hand_masks, CardSet(board_cards).mask, CardSet(known_cards).mask
+
+    @staticmethod
+    def MonteCarlo(hands, comm_cards=None, dead_cards=None, iterations=10000, workers=1, seed=None):
+        hand_masks, board_mask, known_mask = Equity.GetMasks(hands, comm_cards, dead_cards)
+        jobs = []
+        for worker in range(workers):
+            worker_iterations = iterations // workers + (worker < iterations % workers)
+            worker_seed = None if seed is None else f"{seed}-{worker}"
+            jobs.append((hand_masks, board_mask, known_mask, worker_iterations, worker_seed))
+        LookupTable.Generate()
+        if workers == 1:
+            results = [MonteCarloWorker(jobs[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(MonteCarloWorker, jobs))
+        return Equity.Merge(hands, results)
+
+    @staticmethod
+    def Merge(hands, results):
+        wins = [0] * len(hands)
+        ties = [0] * len(hands)
+        shares = [0.0] * len(hands)
+        runouts = 0
+        for worker_wins, worker_ties, worker_shares, worker_runouts in results:
+            for i in range(len(hands)):
+                wins[i] += worker_wins[i]
+                ties[i] += worker_ties[i]
+                shares[i] += worker_shares[i]
+            runouts += worker_runouts
+        return EquityResult(hands, wins, ties, shares, runouts)
+
+    @staticmethod
+    def Score(hand_masks, board_mask, wins, ties, shares):
+        strengths = [LookupTable.GetMaskStrength(board_mask | x) for x in hand_masks]
+        best_strength = max(strengths)
+        winners = [i for i, strength in enumerate(strengths) if strength == best_strength]
+        if len(winners) == 1:
+            wins[winners[0]] += 1
+        else:
+            for i in winners:
+                ties[i] += 1
+                shares[i] += 1 / len(winners)
+
+
+def ExactWorker(job):
+    hand_masks, board_mask, known_mask, missing, tops = job
+    wins = [0] * len(hand_masks)
+    ties = [0] * len(hand_masks)
+    shares = [0.0] * len(hand_masks)
+    runouts = 0
+    if missing == 0:
+        Equity.Score(hand_masks, board_mask, wins, ties, shares)
+        return wins, ties, shares, 1
+    for top in tops:
+        top_mask = board_mask | 1 << top
+        for rest in CardCombinations.GetMasks(missing - 1, known_mask | CardSet.FULL ^ (1 << top) - 1):
+            Equity.Score(hand_masks, top_mask | rest, wins, ties, shares)
+            runouts += 1
+    return wins, ties, shares, runouts
+
+
+def ShowdownWorker(job):
+    boards, counts, hand_masks = job
+    LookupTable.Generate()
+    strengths = array("H")
+    position = 0
+    for board_mask, count in zip(boards, counts):
+        for mask in hand_masks[position:position + count]:
+            mask |= board_mask
+            strengths.append(LookupTable.GetMaskStrength(mask) if 5 <= bin(mask).count("1") <= 7 else 0)
+        position += count
+    return strengths
+
+
+def MonteCarloWorker(job):
+    hand_masks, board_mask, known_mask, iterations, seed = job
+    deck = Deck(rng=random.Random(seed))
+    deck.RemoveCards(CardSet.FromMask(known_mask))
+    missing = 5 - bin(board_mask).count("1")
+    wins = [0] * len(hand_masks)
+    ties = [0] * len(hand_masks)
+    shares = [0.0] * len(hand_masks)
+    for i in range(iterations):
+        deck.Reset()
+        runout_mask = board_mask
+        for j in range(missing):
+            runout_mask |= 1 << deck.GetCard().index
+        Equity.Score(hand_masks, runout_mask, wins, ties, shares)
+    return wins, ties, shares, iterations
+
+
+class PreflopTable:
+    MAGIC = b"PKEQ"
+    VERSION = 2
+    CLASSES = 0
+    COMBOS = 1
+    HEADER = struct.Struct("<4sBBHI")
+    RANK_CHARS = "AKQJT98765432"
+    combos = {}
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.kind, self.size, iterations = PreflopTable.HEADER.unpack_from(self.mmap)
+        if magic != PreflopTable.MAGIC or version != PreflopTable.VERSION:
+            self.mmap.close()
+            raise ValueError(f"{path} is not a preflop equity table!")
+        self.iterations = iterations or None
+        offset = PreflopTable.HEADER.size
+        self.matrix = memoryview(self.mmap)[offset:offset + 4 * self.size * self.size].cast("f")
+        self.done = memoryview(self.mmap)[offset + 4 * self.size * self.size:]
+
+    def __repr__(self):
+        return f"PreflopTable({self.path}, {self.size}x{self.size})"
+
+    def Close(self):
+        self.matrix.release()
+        self.done.release()
+        self.mmap.close()
+
+    def IsComplete(self):
+        return all(self.done)
+
+    def IsExact(self):
+        return self.kind == PreflopTable.COMBOS and self.iterations is None
+
+    def GetIndex(self, hand):
+        if self.kind == PreflopTable.CLASSES:
+            return PreflopTable.GetClassIndex(hand)
+        return PreflopTable.GetComboIndex(hand)
+
+    def HasEquity(self, hand1, hand2):
+        equity = self.matrix[self.GetIndex(hand1) * self.size + self.GetIndex(hand2)]
+        return equity == equity
+
+    def GetEquity(self, hand1, hand2):
+        equity = self.matrix[self.GetIndex(hand1) * self.size + self.GetIndex(hand2)]
+        if equity != equity:
+            raise ValueError(f"{hand1} vs {hand2} is not in {self.path} yet!")
+        return equity
+
+    @staticmethod
+    def GetClassName(index):
+        row, column = divmod(index, 13)
+        if row == column:
+            return PreflopTable.RANK_CHARS[row] * 2
+        if row < column:
+            return PreflopTable.RANK_CHARS[row] + PreflopTable.RANK_CHARS[column] + "s"
+        return PreflopTable.RANK_CHARS[column] + PreflopTable.RANK_CHARS[row] + "o"
+
+    @staticmethod
+    def GetClassIndex(hand):
+        card1, card2 = sorted(hand.cards, key=lambda x: x.value, reverse=True)
+        high, low = 14 - card1.value, 14 - card2.value
+        if card1.suit == card2.suit:
+            return high * 13 + low
+        return low * 13 + high
+
+    @staticmethod
+    def GetComboIndex(hand):
+        low, high = sorted(x.index for x in hand.cards)
+        return low * (103 - low) // 2 + high - low - 1
+
+    @staticmethod
+    def GetCombos(kind, index):
+        if kind not in PreflopTable.combos:
+            hands = [Hand(list(x)) for x in combinations(Card.DECK, 2)]
+            if kind == PreflopTable.COMBOS:
+                PreflopTable.combos[kind] = [[x] for x in hands]
+            else:
+                PreflopTable.combos[kind] = [[] for _ in range(169)]
+                for hand in hands:
+                    PreflopTable.combos[kind][PreflopTable.GetClassIndex(hand)].append(hand)
+        return PreflopTable.combos[kind][index]
+
+    @staticmethod
+    def Create(path, kind, iterations=None):
+        size = 169 if kind == PreflopTable.CLASSES else 1326
+        with open(path, "wb") as file:
+            file.write(PreflopTable.HEADER.pack(PreflopTable.MAGIC, PreflopTable.VERSION, kind, size, iterations or 0))
+            file.write(array("f", [float("nan")]) * (size * size))
+            file.write(bytes(size))
+
+    @staticmethod
+    def Generate(path, kind=CLASSES, rows=None, workers=1, iterations=None, seed=None):
+        if not os.path.exists(path):
+            PreflopTable.Create(path, kind, iterations)
+        table = PreflopTable(path)
+        if table.kind != kind:
+            table.Close()
+            raise ValueError(f"{path} holds a different kind of preflop table!")
+        if table.iterations != (iterations or None):
+            table.Close()
+            raise ValueError(f"{path} was generated with iterations={table.iterations}!")
+        rows = [row for row in (range(table.size) if rows is None else rows) if not table.done[row]]
+        table.Close()
+        LookupTable.Generate()
+        equities = {}
+        with open(path, "r+b") as file:
+            if workers == 1:
+                PreflopTable.WriteRows(file, kind, rows, equities, iterations, seed, map)
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    PreflopTable.WriteRows(file, kind, rows, equities, iterations, seed, executor.map)
+        return len(rows)
+
+    @staticmethod
+    def WriteRows(file, kind, rows, equities, iterations, seed, map_function):
+        size = 169 if kind == PreflopTable.CLASSES else 1326
+        offset = PreflopTable.HEADER.size
+        for row in rows:
+            weights = [PreflopTable.GetWeights(kind, row, column) for column in range(row, size)]
+            jobs = sorted({key for x in weights for key in x if key not in equities})
+            equities.update(map_function(PreflopWorker, [(key, iterations, seed) for key in jobs]))
+            row_equities = [PreflopTable.MergeEquities(x, equities) for x in weights]
+            file.seek(offset + 4 * (row * size + row))
+            file.write(array("f", row_equities).tobytes())
+            for column, equity in enumerate(row_equities[1:], row + 1):
+                file.seek(offset + 4 * (column * size + row))
+                file.write(array("f", [1 - equity]).tobytes())
+            file.seek(offset + 4 * size * size + row)
+            file.write(b"\x01")
+            file.flush()
+
+    @staticmethod
+    def GetWeights(kind, row, column):
+        weights = {}
+        for hand1 in PreflopTable.GetCombos(kind, row):
+            for hand2 in PreflopTable.GetCombos(kind, column):
+                mask1, mask2 = CardSet(hand1.cards).mask, CardSet(hand2.cards).mask
+                if mask1 & mask2:
+                    continue
+                key = Isomorphism.CanonicalizeMasks([mask1, mask2])[0]
+                weights[key] = weights.get(key, 0) + 1
+        return weights
+
+    @staticmethod
+    def MergeEquities(weights, equities):
+        if not weights:
+            return float("nan")
+        return sum(equities[key] * weight for key, weight in weights.items()) / sum(weights.values())
+
+    @staticmethod
+    def ComputeEquity(kind, row, column, iterations=None, seed=None):
+        weights = PreflopTable.GetWeights(kind, row, column)
+        return PreflopTable.MergeEquities(weights, dict(map(PreflopWorker, [(x, iterations, seed) for x in weights])))
+
+
+def PreflopWorker(job):
+    (mask1, mask2), iterations, seed = job
+    hands = [Hand(list(CardSet.FromMask(mask1))), Hand(list(CardSet.FromMask(mask2)))]
+    if iterations is None:
+        return (mask1, mask2), Equity.Exact(hands).equities[0]
+    return (mask1, mask2), Equity.MonteCarlo(hands, iterations=iterations, seed=seed).equities[0]
+
+
+class HandHistory:
+    MAGIC = b"PKHH"
+    VERSION = 1
+    STRENGTHS = 1
+    EMPTY = 63
+    HEADER = struct.Struct("<4sBBB")
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.players, self.flags = HandHistory.HEADER.unpack_from(self.mmap)
+        if magic != HandHistory.MAGIC or version != HandHistory.VERSION:
+            self.mmap.close()
+            raise ValueError(f"{path} is not a hand history file!")
+        self.slots, self.card_bytes, self.record_size = HandHistory.GetLayout(self.players, self.flags)
+        self.records = memoryview(self.mmap)[HandHistory.HEADER.size:]
+        self.count = len(self.records) // self.record_size
+
+    def __repr__(self):
+        return f"HandHistory({self.path}, {self.count} records)"
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.GetDeal(i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+
+    def Close(self):
+        self.records.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            self.records = memoryview(self.mmap)[HandHistory.HEADER.size:]
+            raise BufferError(f"{self.path} can't be closed while arrays from GetArrays are still alive!")
+
+    @staticmethod
+    def GetLayout(players, flags):
+        slots = 5 + 2 * players
+        card_bytes = (6 * slots + 7) // 8
+        return slots, card_bytes, 1 + card_bytes + (2 * players if flags & HandHistory.STRENGTHS else 0)
+
+    def GetRecord(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(f"Record {i} is out of range!")
+        return self.records[i * self.record_size:(i + 1) * self.record_size]
+
+    def GetIndices(self, i):
+        record = self.GetRecord(i)
+        packed = int.from_bytes(record[1:1 + self.card_bytes], "little")
+        indices = [packed >> 6 * x & 63 for x in range(5 + 2 * record[0])]
+        board = [x for x in indices[:5] if x != HandHistory.EMPTY]
+        hands = [[x for x in indices[y:y + 2] if x != HandHistory.EMPTY] for y in range(5, len(indices), 2)]
+        return board, hands
+
+    def GetDeal(self, i):
+        board, hands = self.GetIndices(i)
+        return CommunityCards([Card.DECK[x] for x in board]), [Hand([Card.DECK[x] for x in y]) for y in hands]
+
+    def GetStrengths(self, i):
+        if not self.flags & HandHistory.STRENGTHS:
+            return None
+        record = self.GetRecord(i)
+        offset = 1 + self.card_bytes
+        return record[offset:offset + 2 * record[0]].cast("H").tolist()
+
+    def GetArrays(self, start=0, stop=None):
+        if np is None:
+            raise ImportError("NumPy is required for batch evaluation!")
+        stop = self.count if stop is None else min(stop, self.count)
+        fields = [("players", "u1"), ("cards", "u1", (self.card_bytes,))]
+        if self.flags & HandHistory.STRENGTHS:
+            fields.append(("strengths", "<u2", (self.players,)))
+        records = np.frombuffer(self.mmap, np.dtype(fields), max(stop - start, 0),
+                                HandHistory.HEADER.size + start * self.record_size)
+        bits = np.unpackbits(records["cards"], axis=1, bitorder="little")[:, :6 * self.slots]
+        indices = bits.reshape(len(records), self.slots, 6).astype(np.int64) @ (1 << np.arange(6))
+        arrays = {"players": records["players"], "boards": indices[:, :5],
+                  "hands": indices[:, 5:].reshape(len(records), self.players, 2)}
+        if self.flags & HandHistory.STRENGTHS:
+            arrays["strengths"] = records["strengths"]
+        return arrays
+
+    def GetBatchStrengths(self, start=0, stop=None):
+        arrays = self.GetArrays(start, stop)
+        boards, hands = arrays["boards"], arrays["hands"]
+        strengths = np.zeros(hands.shape[:2], dtype=np.int32)
+        board_sizes = (boards != HandHistory.EMPTY).sum(axis=1)
+        for player in range(self.players):
+            hole_cards = hands[:, player]
+            complete = (hole_cards != HandHistory.EMPTY).all(axis=1) & (player < arrays["players"])
+            for size in (3, 4, 5):
+                rows = np.nonzero(complete & (board_sizes == size))[0]
+                if len(rows):
+                    strengths[rows, player] = Evaluate.GetBatchStrengths(boards[rows, :size], hole_cards[rows])
+        return strengths
+
+    @staticmethod
+    def Pack(comm_cards, hands, players, flags=0, strengths=None):
+        if len(hands) > players or len(comm_cards.cards) > 5 or any(len(x.cards) > 2 for x in hands):
+            raise ValueError(f"A record holds up to 5 board cards and {players} hands of up to 2 cards!")
+        slots, card_bytes, record_size = HandHistory.GetLayout(players, flags)
+        indices = [x.index for x in comm_cards.cards] + [HandHistory.EMPTY] * (5 - len(comm_cards.cards))
+        for hand in hands:
+            indices += [x.index for x in hand.cards] + [HandHistory.EMPTY] * (2 - len(hand.cards))
+        indices += [HandHistory.EMPTY] * (slots - len(indices))
+        packed = 0
+        for i, index in enumerate(indices):
+            packed |= index << 6 * i
+        record = bytes([len(hands)]) + packed.to_bytes(card_bytes, "little")
+        if flags & HandHistory.STRENGTHS:
+            if strengths is None:
+                strengths = [Evaluate.GetStrength(comm_cards.cards + x.cards, EvalMode.TABLE)
+                             if 5 <= len(comm_cards.cards) + len(x.cards) <= 7 else 0 for x in hands]
+            record += array("H", list(strengths) + [0] * (players - len(hands))).tobytes()
+        return record
+
+    @staticmethod
+    def Write(path, deals, players=10, strengths=False, append=False):
+        flags = HandHistory.STRENGTHS if strengths else 0
+        if append and os.path.exists(path):
+            with open(path, "rb") as file:
+                magic, version, players, flags = HandHistory.HEADER.unpack(file.read(HandHistory.HEADER.size))
+            if magic != HandHistory.MAGIC or version != HandHistory.VERSION:
+                raise ValueError(f"{path} is not a hand history file!")
+        else:
+            with open(path, "wb") as file:
+                file.write(HandHistory.HEADER.pack(HandHistory.MAGIC, HandHistory.VERSION, players, flags))
+        written = 0
+        with open(path, "ab") as file:
+            buffer = []
+            for deal in deals:
+                buffer.append(HandHistory.Pack(*deal, players, flags))
+                if len(buffer) == 10000:
+                    file.write(b"".join(buffer))
+                    written += len(buffer)
+                    buffer.clear()
+            file.write(b"".join(buffer))
+            written += len(buffer)
+        return written
+
+
+class Instrumentation:
+    BUCKETS = [1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 1e-1, 1.0]
+    WORKER_ITEMS = {
+        "ExactWorker": lambda x: x[3],
+        "MonteCarloWorker": lambda x: x[3],
+        "ShowdownWorker": len,
+    }
+
+    enabled = False
+    patches = []
+    categories = {}
+    latencies = {}
+    workers = {}
+
+    @staticmethod
+    def Enable():
+        if Instrumentation.enabled:
+            return
+        Instrumentation.Reset()
+        classes = {x: category for category, x in Evaluate.CATEGORIES.items()}
+        classes[Evaluate.RoyalFlush] = 9
+        Instrumentation.Patch(LookupTable, "Lookup", None, lambda x: x and LookupTable.keys[x][0])
+        Instrumentation.Patch(Evaluate, "Classify", None, lambda x: x[0])
+        Instrumentation.Patch(Hand, "ReadDetectors", None, lambda x: classes.get(type(x)))
+        Instrumentation.Patch(Hand, "Read", "Hand.Read")
+        Instrumentation.Patch(Evaluate, "GetWinnerHands", "Evaluate.GetWinnerHands")
+        for pokerhand in classes:
+            for name in list(vars(pokerhand)):
+                if name.startswith("Is"):
+                    Instrumentation.Patch(pokerhand, name, f"Evaluate.{pokerhand.__name__}.{name}")
+        Instrumentation.patches.append((globals(), "ProcessPoolExecutor", ProcessPoolExecutor))
+        globals()["ProcessPoolExecutor"] = InstrumentedExecutor
+        Instrumentation.enabled = True
+
+    @staticmethod
+    def Disable():
+        for owner, name, original in reversed(Instrumentation.patches):
+            if isinstance(owner, dict):
+                owner[name] = original
+            else:
+                setattr(owner, name, original)
+        Instrumentation.patches = []
+        Instrumentation.enabled = False
+
+    @staticmethod
+    def Reset():
+        Instrumentation.categories = {category: 0 for category in Evaluate.CATEGORIES}
+        Instrumentation.latencies = {}
+        Instrumentation.workers = {}
+
+    @staticmethod
+    def Patch(owner, name, timer=None, categorize=None):
+        original = vars(owner)[name]
+        is_static = isinstance(original, staticmethod)
+        function = original.__func__ if is_static else original
+
+        if timer is None:
+            def Wrapper(*args, **kwargs):
+                result = function(*args, **kwargs)
+                category = categorize(result)
+                if category:
+                    Instrumentation.categories[category] += 1
+                return result
+        else:
+            def Wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    Instrumentation.Observe(timer, time.perf_counter() - start)
+
+        Wrapper.__name__ = function.__name__
+        Wrapper.__wrapped__ = function
+        Instrumentation.patches.append((owner, name, original))
+        setattr(owner, name, staticmethod(Wrapper) if is_static else Wrapper)
+
+    @staticmethod
+    def Observe(name, seconds):
+        latency = Instrumentation.latencies.get(name)
+        if latency is None:
+            latency = Instrumentation.latencies[name] = {"count": 0, "sum": 0.0,
+                                                          "buckets": [0] * (len(Instrumentation.BUCKETS) + 1)}
+        latency["count"] += 1
+        latency["sum"] += seconds
+        latency["buckets"][bisect_left(Instrumentation.BUCKETS, seconds)] += 1
+
+    @staticmethod
+    def ObserveWorker(function, pid, seconds, result):
+        worker = Instrumentation.workers.setdefault(pid, {"jobs": 0, "items": 0, "seconds": 0.0})
+        worker["jobs"] += 1
+        worker["items"] += Instrumentation.WORKER_ITEMS.get(function.__name__, lambda x: 1)(result)
+        worker["seconds"] += seconds
+
+    @staticmethod
+    def GetSnapshot():
+        caches = {"eval": Evaluate.cache, "nut_ranking": NutRanking.cache, "hand_potential": HandPotential.cache}
+        workers = {}
+        for pid, worker in Instrumentation.workers.items():
+            workers[pid] = dict(worker, items_per_second=worker["items"] / worker["seconds"] if worker["seconds"]
+                                else 0.0)
+        return {
+            "enabled": Instrumentation.enabled,
+            "categories": {Evaluate.CATEGORIES[x].__name__: count for x, count in Instrumentation.categories.items()},
+            "latencies": {name: {"count": x["count"], "sum": x["sum"], "buckets": list(x["buckets"])}
+                          for name, x in Instrumentation.latencies.items()},
+            "caches": {name: x.GetStats() for name, x in caches.items() if x is not None},
+            "workers": workers,
+        }
+
+    @staticmethod
+    def GetPrometheus(snapshot=None):
+        snapshot = Instrumentation.GetSnapshot() if snapshot is None else snapshot
+        lines = ["# TYPE poker_evaluations_total counter"]
+        for category, count in snapshot["categories"].items():
+            lines.append(f'poker_evaluations_total{{category="{category}"}} {count}')
+        lines.append("# TYPE poker_call_seconds histogram")
+        for name, latency in snapshot["latencies"].items():
+            cumulative = 0
+            for bucket, count in zip(Instrumentation.BUCKETS + ["+Inf"], latency["buckets"]):
+                cumulative += count
+                lines.append(f'poker_call_seconds_bucket{{function="{name}",le="{bucket}"}} {cumulative}')
+            lines.append(f'poker_call_seconds_sum{{function="{name}"}} {latency["sum"]}')
+            lines.append(f'poker_call_seconds_count{{function="{name}"}} {latency["count"]}')
+        for metric, kind in [("hits", "counter"), ("misses", "counter"), ("evictions", "counter"),
+                             ("size", "gauge"), ("hit_ratio", "gauge")]:
+            suffix = "_total" if kind == "counter" else ""
+            lines.append(f"# TYPE poker_cache_{metric}{suffix} {kind}")
+            for name, stats in snapshot["caches"].items():
+                lines.append(f'poker_cache_{metric}{suffix}{{cache="{name}"}} {stats[metric]}')
+        for metric, kind in [("jobs", "counter"), ("items", "counter"), ("seconds", "counter"),
+                             ("items_per_second", "gauge")]:
+            suffix = "_total" if kind == "counter" else ""
+            lines.append(f"# TYPE poker_worker_{metric}{suffix} {kind}")
+            for pid, worker in snapshot["workers"].items():
+                lines.append(f'poker_worker_{metric}{suffix}{{pid="{pid}"}} {worker[metric]}')
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedExecutor(ProcessPoolExecutor):
+    def submit(self, fn, *args, **kwargs):
+        inner = super().submit(TimedCall, fn, *args, **kwargs)
+        outer = Future()
+
+        def Done(future):
+            try:
+                pid, seconds, result = future.result()
+            except BaseException as error:
+                outer.set_exception(error)
+                return
+            Instrumentation.ObserveWorker(fn, pid, seconds, result)
+            outer.set_result(result)
+
+        inner.add_done_callback(Done)
+        return outer
+
+    def map(self, fn, *iterables, timeout=None, chunksize=1):
+        return Executor.map(self, fn, *iterables, timeout=timeout)
+
+
+def TimedCall(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return os.getpid(), time.perf_counter() - start, result
+
+
+class Profile:
+    def __init__(self, sort="cumulative", limit=30, memory=True):
+        self.sort = sort
+        self.limit = limit
+        self.memory = memory
+        self.profiler = None
+        self.stats = None
+        self.seconds = None
+        self.memory_current = None
+        self.memory_peak = None
+        self.memory_top = []
+
+    def __repr__(self):
+        return self.stats or "Profile()"
+
+    def __enter__(self):
+        if self.memory:
+            self.started_tracing = not tracemalloc.is_tracing()
+            if self.started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.snapshot = tracemalloc.take_snapshot()
+        self.profiler = cProfile.Profile()
+        self.start = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.disable()
+        self.seconds = time.perf_counter() - self.start
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats(self.sort).print_stats(self.limit)
+        self.stats = stream.getvalue()
+        if self.memory:
+            self.memory_current, self.memory_peak = tracemalloc.get_traced_memory()
+            statistics = tracemalloc.take_snapshot().compare_to(self.snapshot, "lineno")
+            self.memory_top = [str(x) for x in statistics[:self.limit]]
+            self.snapshot = None
+            if self.started_tracing:
+                tracemalloc.stop()
+        return False
 
-    hand2 = Hand([Card(card_list[2]), Card(card_list[3])])
-    print("Hand2: "+str(hand2))
-    evaled_hand2 = hand2.Read(comm_cards)
-    print(evaled_hand2.GetName())
 
-    if Evaluate.GetWinnerHands(comm_cards, [hand, hand2]) == [hand, hand2]:
-        print("Split Pot")
-    elif Evaluate.GetWinnerHands(comm_cards, [hand, hand2]) == [hand]:
-        print("Hand 1 won!")
+def ParseDeal(line, input_format):
+    if input_format == "json":
+        deal = json.loads(line)
+        if not isinstance(deal, dict):
+            raise ValueError("A JSON deal should be an object!")
+        board, hands = deal.get("board", []), deal.get("hands", [])
     else:
-        print("Hand 2 won!")
-
-"""
-deck = Deck()
-comm_cards = CommunityCards([Card("JS"), Card("QH"), Card("3S"), Card("5S"), Card("6s")])
-print("Comm: "+str(comm_cards))
-
-hand = Hand([Card("QD"), Card("7D")])
-print("Hand1: "+str(hand))
-evaled_hand = hand.Read(comm_cards)
-print(evaled_hand.GetName())
-
-hand2 = Hand([Card("QC"), Card("8S")])
-print("Hand2: "+str(hand2))
-evaled_hand2 = hand2.Read(comm_cards)
-print(evaled_hand2.GetName())
-
-if Evaluate.GetWinnerHands(comm_cards, [hand, hand2]) == [hand, hand2]:
-    print("Split Pot")
-elif Evaluate.GetWinnerHands(comm_cards, [hand, hand2]) == [hand]:
-    print("Hand 1 won!")
-else:
-    print("Hand 2 won!")
-"""
\ No newline at end of file
+        groups = line.split("|")
+        board, hands = groups[0].split(), [x.split() for x in groups[1:]]
+    comm_cards = CommunityCards([Card(x) for x in board])
+    hands = [Hand([Card(x) for x in hand]) for hand in hands]
+    if not hands:
+        raise ValueError("A deal needs at least one hand!")
+    if len(comm_cards.cards) > 5 or not all(5 <= len(comm_cards.cards) + len(x.cards) <= 7 for x in hands):
+        raise ValueError("Every hand needs 5 to 7 cards together with the board!")
+    known_cards = comm_cards.cards + [x for hand in hands for x in hand.cards]
+    if len(set(known_cards)) != len(known_cards):
+        raise ValueError("The same card can't be in more than one place!")
+    return comm_cards, hands
+
+
+def FormatShowdown(showdown, output_format):
+    winners = [showdown.GetIndex(x) for x in showdown.winners]
+    categories = [Evaluate.CATEGORIES[LookupTable.keys[x][0]].__name__ for x in showdown.strengths]
+    if output_format == "json":
+        return json.dumps({"winners": winners, "categories": categories, "strengths": showdown.strengths}) + "\n"
+    results = " ".join([f"{category}:{strength}" for category, strength in zip(categories, showdown.strengths)])
+    return f"{','.join([str(x) for x in winners])}\t{results}\n"
+
+
+def FormatError(line_number, error, output_format):
+    if output_format == "json":
+        return json.dumps({"line": line_number, "error": str(error)}) + "\n"
+    return f"error\tline {line_number}: {error}\n"
+
+
+def ReadLines(path):
+    if path == "-":
+        yield from sys.stdin.buffer
+        return
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter(mapped.readline, b"")
+
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m main", description="Evaluates poker showdowns line by line.")
+    parser.add_argument("input", nargs="?", default="-", help="input file, - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file, - for stdout")
+    parser.add_argument("-f", "--format", choices=["text", "json"], default="text",
+                        help="text lines like 'Js Qh 3s 5s 6s | Qd 7d | Qc 8s' or JSON lines")
+    parser.add_argument("-b", "--batch-size", type=int, default=10000, help="deals per batch")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes")
+    args = parser.parse_args(argv)
+
+    LookupTable.GenerateStrengths()
+    order = deque()
+
+    def GetDeals():
+        for line_number, line in enumerate(ReadLines(args.input), 1):
+            try:
+                line = line.decode("utf-8").strip()
+                if not line or line.startswith("#"):
+                    continue
+                deal = ParseDeal(line, args.format)
+            except (ValueError, TypeError, PokerExceptions.IncorrectSuit, PokerExceptions.IncorrectRank,
+                    PokerExceptions.IncorrectCardString) as error:
+                order.append(FormatError(line_number, error, args.format))
+                continue
+            order.append(None)
+            yield deal
+
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    buffer = []
+    try:
+        for showdown in Evaluate.GetBatchShowdowns(GetDeals(), args.workers, args.batch_size):
+            while order[0] is not None:
+                buffer.append(order.popleft())
+            order.popleft()
+            buffer.append(FormatShowdown(showdown, args.format))
+            if len(buffer) >= args.batch_size:
+                output.write("".join(buffer).encode("utf-8"))
+                buffer.clear()
+        buffer.extend(order)
+    finally:
+        output.write("".join(buffer).encode("utf-8"))
+        output.flush()
+        if output is not sys.stdout.buffer:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
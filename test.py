@@ -1,4 +1,13 @@
+import os
+import pickle
+import random
+import sys
+import tempfile
+import threading
 import unittest
+from itertools import combinations
+
+import bench
 import main
 
 
@@ -40,6 +49,15 @@ class TestCard(unittest.TestCase):
         card2 = main.Card("As")
         self.assertEqual(card1, card2)
 
+    def test_shared_cards_are_immutable(self):
+        card = main.Card("As")
+        for name in ("suit", "rank", "display", "value", "index"):
+            with self.assertRaises(AttributeError):
+                setattr(card, name, 2)
+        with self.assertRaises(AttributeError):
+            del card.value
+        self.assertEqual((main.Card.DECK[card.index].value, main.Card("As").display), (14, "As"))
+
     def test_value(self):
         cards = GetDeck()[:13]
         values = []
@@ -111,6 +129,31 @@ class TestCard(unittest.TestCase):
         with self.assertRaises(main.PokerExceptions.IncorrectRank):
             main.Card("Xs")
 
+    def test_instances_are_canonical(self):
+        self.assertIs(main.Card("As"), main.Card("aS"))
+
+    def test_hash(self):
+        cards = {main.Card("As"), main.Card("as"), main.Card("Ks")}
+        self.assertEqual(len(cards), 2)
+
+    def test_index(self):
+        self.assertEqual([main.Card(x).index for x in GetDeck()], list(range(52)))
+
+    def test_from_index(self):
+        self.assertIs(main.Card.FromIndex(51), main.Card("Ac"))
+
+    def test_cannot_get_from_incorrect_index(self):
+        with self.assertRaises(main.PokerExceptions.IncorrectCardString):
+            main.Card.FromIndex(52)
+
+    def test_pickle(self):
+        card = main.Card("10d")
+        self.assertIs(pickle.loads(pickle.dumps(card)), card)
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            main.Card("2h").color = "red"
+
 
 class TestHand(unittest.TestCase):
 
@@ -273,6 +316,60 @@ class TestCommunityCards(unittest.TestCase):
         self.assertEqual(suits, correct_suits)
 
 
+class TestIncrementalCommunityCards(unittest.TestCase):
+
+    def setUp(self):
+        self.comm_cards = main.CommunityCards()
+        self.hands = [GetHandByStr(["Ah", "Kc"]), GetHandByStr(["Qh", "10c"])]
+        for hand in self.hands:
+            self.comm_cards.AddPlayer(hand)
+
+    def GetReadStrengths(self):
+        return [x.Read(self.comm_cards).GetStrength() for x in self.hands]
+
+    def test_preflop(self):
+        self.assertEqual(self.comm_cards.GetPlayerStrengths(), [None, None])
+
+    def test_streets(self):
+        self.comm_cards.PushFlop(GetCardsByStr(["Ac", "Js", "2d"]))
+        self.assertEqual(self.comm_cards.GetPlayerStrengths(), self.GetReadStrengths())
+        self.comm_cards.PushTurn(main.Card("Kd"))
+        self.assertEqual(self.comm_cards.GetPlayerStrengths(), self.GetReadStrengths())
+        self.comm_cards.PushRiver(main.Card("9h"))
+        self.assertEqual(self.comm_cards.GetPlayerStrengths(), self.GetReadStrengths())
+
+    def test_showdown(self):
+        self.comm_cards.PushFlop(GetCardsByStr(["Ac", "Js", "Kd"]))
+        self.assertEqual(self.comm_cards.GetShowdown().winners, [self.hands[1]])
+
+    def test_cards_changed_directly(self):
+        self.comm_cards.PushFlop(GetCardsByStr(["Ac", "Js", "2d"]))
+        self.comm_cards.GetPlayerStrengths()
+        self.comm_cards.cards.append(main.Card("Kd"))
+        self.assertEqual(self.comm_cards.GetPlayerStrengths(), self.GetReadStrengths())
+
+    def test_card_replaced_in_place(self):
+        comm_cards = GetCommCardsByStr(["2h", "7d", "9c", "Jh", "3s"])
+        hands = [GetHandByStr(["Ah", "Kh"]), GetHandByStr(["Qs", "Qd"])]
+        self.assertEqual(main.Evaluate.GetWinnerHands(comm_cards, hands), [hands[1]])
+        comm_cards.cards[4] = main.Card("Ad")
+        self.assertEqual(main.Evaluate.GetWinnerHands(comm_cards, hands), [hands[0]])
+        comm_cards.cards = GetCardsByStr(["2h", "7d", "9c", "Jh", "Qc"])
+        self.assertEqual(main.Evaluate.GetWinnerHands(comm_cards, hands), [hands[1]])
+
+    def test_histogram_mode(self):
+        self.comm_cards.PushFlop(GetCardsByStr(["Ac", "Js", "2d"]))
+        self.assertEqual(self.comm_cards.GetPlayerStrengths(main.EvalMode.HISTOGRAM), self.GetReadStrengths())
+
+    def test_remove_player(self):
+        self.comm_cards.RemovePlayer(self.hands[0])
+        self.assertEqual(self.comm_cards.GetPlayers(), [self.hands[1]])
+
+    def test_cannot_get_strength_of_unknown_player(self):
+        with self.assertRaises(ValueError):
+            self.comm_cards.GetPlayerStrength(GetHandByStr(["2h", "3h"]))
+
+
 class TestHandRead(unittest.TestCase):
 
     def test_read_flush(self):
@@ -402,6 +499,452 @@ class TestHandRead(unittest.TestCase):
         self.assertTrue(type(temp) == main.Evaluate.RoyalFlush and str(temp) == "AcKcQcJc10c")
 
 
+class TestCardSet(unittest.TestCase):
+
+    def test_len(self):
+        self.assertEqual(len(main.CardSet(GetCardsByStr(["As", "Kd", "As"]))), 2)
+
+    def test_contains(self):
+        card_set = main.CardSet(GetCardsByStr(["As", "Kd"]))
+        self.assertTrue(main.Card("Kd") in card_set and main.Card("Ks") not in card_set)
+
+    def test_iter(self):
+        card_set = main.CardSet(GetCardsByStr(["Ac", "2h", "Kd"]))
+        self.assertEqual(list(card_set), GetCardsByStr(["2h", "Kd", "Ac"]))
+
+    def test_union_intersection_difference(self):
+        card_set1 = main.CardSet(GetCardsByStr(["As", "Kd", "Qh"]))
+        card_set2 = main.CardSet(GetCardsByStr(["As", "2c"]))
+        self.assertEqual(str(card_set1 | card_set2), "QhKdAs2c")
+        self.assertEqual(str(card_set1 & card_set2), "As")
+        self.assertEqual(str(card_set1 - card_set2), "QhKd")
+
+    def test_invert(self):
+        self.assertEqual(len(~main.CardSet(GetCardsByStr(["As", "Kd"]))), 50)
+
+    def test_hand_round_trip(self):
+        hand = GetHandByStr(["Kd", "As"])
+        self.assertEqual(str(main.Hand.FromCardSet(hand.GetCardSet())), "KdAs")
+
+    def test_deck(self):
+        deck = main.Deck()
+        deck.GetCard()
+        self.assertEqual(len(deck.GetCardSet()), 51)
+
+    def test_strength(self):
+        comm_cards = GetCommCardsByStr(["Ac", "Js", "Kd", "8c", "9h"])
+        myhand = GetHandByStr(["Ah", "Kc"])
+        card_set = comm_cards.GetCardSet() | myhand.GetCardSet()
+        self.assertEqual(card_set.GetStrength(), myhand.Read(comm_cards).GetStrength())
+
+
+class TestLookupTable(unittest.TestCase):
+
+    def GetBestFiveCardStrength(self, cards):
+        best = 0
+        for five_cards in combinations(cards, 5):
+            counts = [0] * 15
+            for card in five_cards:
+                counts[card.value] += 1
+            category, ranks = main.LookupTable.GetRankKey(counts)
+            if len(set(x.suit for x in five_cards)) == 1:
+                category = 9 if category == 5 else 6
+            best = max(best, main.LookupTable.strengths[(category, ranks)])
+        return best
+
+    def test_distinct_hand_count(self):
+        main.LookupTable.Generate()
+        self.assertEqual(len(main.LookupTable.keys) - 1, 7462)
+
+    def test_royal_flush_is_strongest(self):
+        cards = GetCardsByStr(["Ah", "Kh", "Qh", "Jh", "10h"])
+        self.assertEqual(main.LookupTable.GetStrength(cards), 7462)
+
+    def test_seven_high_is_weakest(self):
+        cards = GetCardsByStr(["7h", "5d", "4h", "3c", "2h"])
+        self.assertEqual(main.LookupTable.GetStrength(cards), 1)
+
+    def test_matches_best_five_card_subset(self):
+        rng = random.Random(7)
+        deck = GetDeck()
+        for _ in range(500):
+            cards = GetCardsByStr(rng.sample(deck, rng.choice([5, 6, 7])))
+            self.assertEqual(main.LookupTable.GetStrength(cards), self.GetBestFiveCardStrength(cards))
+
+    def test_read_fullhouse_from_two_threes(self):
+        comm_cards = GetCommCardsByStr(["Ac", "As", "Kd", "Kc", "9h"])
+        myhand = GetHandByStr(["Ah", "Ks"])
+        temp = myhand.Read(comm_cards)
+        self.assertTrue(type(temp) == main.Evaluate.FullHouse and str(temp) == "AcAsAhKdKc")
+
+    def test_read_non_wheel_with_ace(self):
+        comm_cards = GetCommCardsByStr(["7c", "Jc", "6h", "8s", "Ac"])
+        myhand = GetHandByStr(["5d", "6c"])
+        temp = myhand.Read(comm_cards)
+        self.assertEqual(type(temp), main.Evaluate.Pair)
+
+    def test_read_wheel_straightflush(self):
+        comm_cards = GetCommCardsByStr(["2c", "3c", "4c", "5c", "Kd"])
+        myhand = GetHandByStr(["Ac", "Kc"])
+        temp = myhand.Read(comm_cards)
+        self.assertTrue(type(temp) == main.Evaluate.StraightFlush and str(temp) == "Ac2c3c4c5c"
+                        and str(temp.high) == "5c")
+
+    def test_wheel_straightflush_loses(self):
+        comm_cards = GetCommCardsByStr(["2c", "3c", "4c", "5c", "Kd"])
+        myhand = GetHandByStr(["Ac", "Kc"])
+        herhand = GetHandByStr(["6c", "2d"])
+        self.assertEqual(main.Evaluate.GetWinnerHands(comm_cards, [myhand, herhand]), [herhand])
+
+
+class TestPokerHandStrength(unittest.TestCase):
+
+    def test_strength_range(self):
+        comm_cards = GetCommCardsByStr(["2c", "Js", "Kd", "8c", "9h"])
+        strength = GetHandByStr(["Ah", "Qc"]).Read(comm_cards).GetStrength()
+        self.assertTrue(1 <= strength <= 7462)
+
+    def test_detectors_strength_matches_table(self):
+        comm_cards = GetCommCardsByStr(["Ac", "Js", "Kd", "8c", "9h"])
+        myhand = GetHandByStr(["Ah", "Kc"])
+        self.assertEqual(myhand.ReadDetectors(comm_cards).GetStrength(), myhand.Read(comm_cards).GetStrength())
+
+    def test_lt_across_categories(self):
+        comm_cards = GetCommCardsByStr(["Ac", "As", "Kd", "8c", "9h"])
+        threeofkind = GetHandByStr(["Ah", "2d"]).Read(comm_cards)
+        fullhouse = GetHandByStr(["Ah", "Kc"]).Read(comm_cards)
+        self.assertTrue(threeofkind < fullhouse and threeofkind <= fullhouse and fullhouse >= threeofkind)
+
+    def test_sorted(self):
+        comm_cards = GetCommCardsByStr(["Ac", "Js", "Kd", "8c", "9h"])
+        hands = [GetHandByStr(x) for x in [["Ah", "Kc"], ["2h", "3c"], ["Qh", "10c"], ["Ad", "Qc"]]]
+        pokerhands = sorted([x.Read(comm_cards) for x in hands])
+        self.assertEqual([type(x) for x in pokerhands],
+                         [main.Evaluate.High, main.Evaluate.Pair, main.Evaluate.TwoPair, main.Evaluate.Straight])
+
+    def test_hash(self):
+        comm_cards = GetCommCardsByStr(["6d", "7c", "9d", "10h", "Jh"])
+        my = GetHandByStr(["As", "Kc"]).Read(comm_cards)
+        her = GetHandByStr(["Ah", "Ks"]).Read(comm_cards)
+        other = GetHandByStr(["Ah", "Qs"]).Read(comm_cards)
+        self.assertEqual(len({my, her, other}), 2)
+
+
+class TestLazyPokerHand(unittest.TestCase):
+
+    def test_results_have_slots(self):
+        pokerhand = GetHandByStr(["As", "Ad"]).Read(GetCommCardsByStr(["Ah", "Kh", "7d", "2c", "9s"]))
+        self.assertFalse(hasattr(pokerhand, "__dict__"))
+        self.assertEqual(type(pokerhand).__slots__, ("three_cards", "kicker_cards"))
+
+    def test_fields_match_eager_results(self):
+        rng = random.Random(3)
+        for i in range(300):
+            cards = rng.sample(main.Card.DECK, 7)
+            pokerhand = main.Hand(cards[:2]).Read(main.CommunityCards(cards[2:]))
+            category, ranks = main.LookupTable.keys[pokerhand.GetStrength()]
+            eager = main.Evaluate.CATEGORIES[category].FromRanks(ranks, cards[2:] + cards[:2])
+            self.assertEqual((type(pokerhand), str(pokerhand), pokerhand.GetName()),
+                             (type(eager), str(eager), eager.GetName()))
+            for field in type(eager).__slots__:
+                self.assertEqual(getattr(pokerhand, field), getattr(eager, field))
+
+    def test_cards_keep_order(self):
+        cards = GetCardsByStr(["Kd", "2c", "Ah", "9s", "Kh", "7d", "Ad"])
+        pokerhand = main.Evaluate.FromStrength(main.Evaluate.GetStrength(cards), cards)
+        self.assertEqual(pokerhand.GetCards(), cards)
+
+    def test_royal_flush_type(self):
+        pokerhand = GetHandByStr(["Ah", "Kh"]).Read(GetCommCardsByStr(["Qh", "Jh", "10h", "2c", "9s"]))
+        self.assertTrue(type(pokerhand) is main.Evaluate.RoyalFlush and str(pokerhand.suit) == "h")
+
+    def test_pickle(self):
+        pokerhand = GetHandByStr(["As", "Ad"]).Read(GetCommCardsByStr(["Ah", "Kh", "7d", "2c", "9s"]))
+        copy = pickle.loads(pickle.dumps(pokerhand))
+        self.assertEqual((copy, str(copy)), (pokerhand, str(pokerhand)))
+
+    def test_results_are_immutable(self):
+        pokerhand = GetHandByStr(["As", "Ad"]).Read(GetCommCardsByStr(["Ah", "Kh", "7d", "2c", "9s"]))
+        eager = main.Evaluate.ThreeOfKind(pokerhand.three_cards, pokerhand.kicker_cards)
+        for x in (pokerhand, eager):
+            strength = x.GetStrength()
+            for name in ("strength", "three_cards", "kicker_cards"):
+                with self.assertRaises(AttributeError):
+                    setattr(x, name, None)
+            with self.assertRaises(AttributeError):
+                del x.strength
+            self.assertEqual((x.GetStrength(), hash(x)), (strength, hash(strength)))
+
+    def test_shared_lazy_fill(self):
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            errors = []
+            for i in range(300):
+                pokerhand = GetHandByStr(["As", "Ad"]).Read(GetCommCardsByStr(["Ah", "Kh", "7d", "2c", "9s"]))
+                results = []
+
+                def Work():
+                    try:
+                        results.append(str(pokerhand.kicker_cards))
+                    except AttributeError as e:
+                        errors.append(e)
+
+                threads = [threading.Thread(target=Work) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(len(set(results)), 1)
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+
+    def test_unknown_attribute(self):
+        pokerhand = GetHandByStr(["As", "Ad"]).Read(GetCommCardsByStr(["Ah", "Kh", "7d", "2c", "9s"]))
+        with self.assertRaises(AttributeError):
+            pokerhand.quad_cards
+
+
+class TestHistogramMode(unittest.TestCase):
+
+    def test_matches_table(self):
+        rng = random.Random(11)
+        deck = GetDeck()
+        for _ in range(1000):
+            cards = GetCardsByStr(rng.sample(deck, rng.choice([5, 6, 7])))
+            self.assertEqual(main.Evaluate.GetStrength(cards, main.EvalMode.HISTOGRAM),
+                             main.Evaluate.GetStrength(cards, main.EvalMode.TABLE))
+
+    def test_read_wheel(self):
+        comm_cards = GetCommCardsByStr(["2s", "3c", "2d", "Ad", "5h"])
+        myhand = GetHandByStr(["Ac", "4d"])
+        temp = myhand.Read(comm_cards, main.EvalMode.HISTOGRAM)
+        self.assertTrue(IsStraightCorrect(temp, "Ad2s3c4d5h", "5h"))
+
+    def test_read_royalflush(self):
+        comm_cards = GetCommCardsByStr(["5c", "6c", "10c", "Jc", "Qc"])
+        myhand = GetHandByStr(["Ac", "Kc"])
+        temp = myhand.Read(comm_cards, main.EvalMode.HISTOGRAM)
+        self.assertTrue(type(temp) == main.Evaluate.RoyalFlush and str(temp) == "AcKcQcJc10c")
+
+    def test_default_mode(self):
+        comm_cards = GetCommCardsByStr(["Qc", "Jc", "9d", "2c", "10h"])
+        myhand = GetHandByStr(["9c", "8c"])
+        herhand = GetHandByStr(["Ac", "3c"])
+        main.Evaluate.mode = main.EvalMode.HISTOGRAM
+        try:
+            self.assertEqual(main.Evaluate.GetWinnerHands(comm_cards, [myhand, herhand]), [herhand])
+        finally:
+            main.Evaluate.mode = main.EvalMode.TABLE
+
+    def test_cannot_get_strength_in_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            main.Evaluate.GetStrength(GetCardsByStr(["Qc", "Jc", "9d", "2c", "10h"]), "abc")
+
+
+class TestShowdown(unittest.TestCase):
+
+    def GetShowdown(self, mode=None):
+        comm_cards = GetCommCardsByStr(["Ac", "Js", "Kd", "8c", "9h"])
+        hands = [GetHandByStr(x) for x in [["2h", "3c"], ["Ah", "Kc"], ["Qh", "10c"], ["Ad", "Ks"]]]
+        return main.Evaluate.GetShowdown(comm_cards, hands, mode), hands
+
+    def test_winners(self):
+        showdown, hands = self.GetShowdown()
+        self.assertEqual(showdown.winners, [hands[2]])
+
+    def test_ranking(self):
+        showdown, hands = self.GetShowdown()
+        self.assertEqual(showdown.ranking, [[hands[2]], [hands[1], hands[3]], [hands[0]]])
+
+    def test_strengths(self):
+        showdown, hands = self.GetShowdown()
+        comm_cards = showdown.comm_cards
+        self.assertEqual(showdown.strengths, [x.Read(comm_cards).GetStrength() for x in hands])
+
+    def test_modes_agree(self):
+        showdown, hands = self.GetShowdown()
+        for mode in main.EvalMode.MODES:
+            self.assertEqual(self.GetShowdown(mode)[0].strengths, showdown.strengths)
+
+    def test_get_pokerhand(self):
+        showdown, hands = self.GetShowdown()
+        temp = showdown.GetPokerHand(hands[2])
+        self.assertTrue(type(temp) == main.Evaluate.Straight and str(temp) == "AcKdQhJs10c")
+
+    def test_get_rank(self):
+        showdown, hands = self.GetShowdown()
+        self.assertEqual([showdown.GetRank(x) for x in hands], [2, 1, 0, 1])
+
+    def test_side_pot(self):
+        showdown, hands = self.GetShowdown()
+        self.assertEqual(showdown.GetWinnerHands([hands[0], hands[3]]), [hands[3]])
+
+    def test_cannot_get_unknown_hand(self):
+        showdown, hands = self.GetShowdown()
+        with self.assertRaises(ValueError):
+            showdown.GetStrength(GetHandByStr(["2h", "3c"]))
+
+
+class TestBatchShowdown(unittest.TestCase):
+
+    def GetDeals(self, count, seed=0):
+        rng = random.Random(seed)
+        for i in range(count):
+            cards = rng.sample(main.Card.DECK, 11)
+            yield main.CommunityCards(cards[:5]), [main.Hand(cards[x:x + 2]) for x in range(5, 11, 2)]
+
+    def test_matches_single_showdowns(self):
+        deals = list(self.GetDeals(300))
+        expected = [main.Evaluate.GetWinnerHands(*x) for x in deals]
+        self.assertEqual(list(main.Evaluate.GetBatchWinnerHands(deals, chunksize=7)), expected)
+
+    def test_process_pool_keeps_order(self):
+        deals = list(self.GetDeals(300, 1))
+        expected = [main.Evaluate.GetWinnerHands(*x) for x in deals]
+        self.assertEqual(list(main.Evaluate.GetBatchWinnerHands(deals, workers=2, chunksize=25)), expected)
+
+    def test_streams_unbounded_input(self):
+        deals = self.GetDeals(10 ** 9)
+        winners = main.Evaluate.GetBatchWinnerHands(deals, chunksize=10)
+        self.assertEqual(len([next(winners) for i in range(25)]), 25)
+
+    def test_short_deals_use_detectors(self):
+        comm_cards = GetCommCardsByStr(["Ac", "Js", "Kd"])
+        hands = [GetHandByStr(["Ah"]), GetHandByStr(["2h"])]
+        self.assertEqual(list(main.Evaluate.GetBatchWinnerHands([(comm_cards, hands)])), [[hands[0]]])
+
+
+@unittest.skipIf(main.np is None, "NumPy is not installed")
+class TestBatchEvaluate(unittest.TestCase):
+
+    def test_matches_read(self):
+        rng = random.Random(13)
+        for size in (5, 6, 7):
+            rows = [rng.sample(range(52), size) for _ in range(300)]
+            strengths = main.Evaluate.GetBatchStrengths(rows).tolist()
+            expected = []
+            for row in rows:
+                cards = [main.Card.FromIndex(x) for x in row]
+                expected.append(main.Hand(cards[:2]).Read(main.CommunityCards(cards[2:])).GetStrength())
+            self.assertEqual(strengths, expected)
+
+    def test_board_and_hole_cards(self):
+        comm_cards = GetCommCardsByStr(["Ac", "Js", "Kd", "8c", "9h"])
+        hands = [GetHandByStr(x) for x in [["2h", "3c"], ["Ah", "Kc"], ["Qh", "10c"]]]
+        board = [x.index for x in comm_cards.cards]
+        hole_cards = [[x.index for x in hand.cards] for hand in hands]
+        self.assertEqual(main.Evaluate.GetBatchStrengths(board, hole_cards).tolist(),
+                         [x.Read(comm_cards).GetStrength() for x in hands])
+
+    def test_cannot_evaluate_incorrect_shape(self):
+        with self.assertRaises(ValueError):
+            main.Evaluate.GetBatchStrengths([[1, 2, 3, 4]])
+
+    def test_cannot_evaluate_incorrect_index(self):
+        with self.assertRaises(ValueError):
+            main.Evaluate.GetBatchStrengths([[1, 2, 3, 4, 52]])
+
+    def test_cannot_evaluate_repeated_index(self):
+        for row in ([0, 0, 0, 0, 0, 1, 2], [12] * 7):
+            with self.assertRaises(ValueError):
+                main.Evaluate.GetBatchStrengths([list(range(7)), row])
+
+
+class TestEvalCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = main.Evaluate.SetCache(2)
+
+    def tearDown(self):
+        main.Evaluate.SetCache(None)
+
+    def test_hits_and_misses(self):
+        comm_cards = GetCommCardsByStr(["Ac", "Js", "Kd", "8c", "9h"])
+        myhand = GetHandByStr(["Ah", "Kc"])
+        myhand.Read(comm_cards)
+        myhand.Read(comm_cards)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_suit_isomorphic_hit(self):
+        main.Evaluate.GetStrength(GetCardsByStr(["Ah", "Kh", "2h", "7h", "9c"]))
+        strength = main.Evaluate.GetStrength(GetCardsByStr(["As", "Ks", "2s", "7s", "9d"]))
+        self.assertEqual((self.cache.hits, strength),
+                         (1, main.LookupTable.GetStrength(GetCardsByStr(["Ah", "Kh", "2h", "7h", "9c"]))))
+
+    def test_order_independent_key(self):
+        cards = GetCardsByStr(["Ah", "Kd", "2h", "7s", "9c"])
+        self.assertEqual(main.EvalCache.GetKey(cards), main.EvalCache.GetKey(cards[::-1]))
+
+    def test_eviction(self):
+        for card_strs in [["Ah", "Kd", "2h", "7s", "9c"], ["Ah", "Kd", "3h", "7s", "9c"],
+                          ["Ah", "Kd", "4h", "7s", "9c"], ["Ah", "Kd", "2h", "7s", "9c"]]:
+            main.Evaluate.GetStrength(GetCardsByStr(card_strs))
+        self.assertEqual((len(self.cache), self.cache.evictions, self.cache.hits), (2, 2, 0))
+
+    def test_showdown_uses_cache(self):
+        comm_cards = GetCommCardsByStr(["Ac", "Js", "Kd", "8c", "9h"])
+        hands = [GetHandByStr(["Ah", "Kc"]), GetHandByStr(["Ad", "Ks"])]
+        main.Evaluate.GetWinnerHands(comm_cards, hands)
+        winners = main.Evaluate.GetWinnerHands(comm_cards, hands)
+        self.assertEqual((winners, self.cache.hits, self.cache.misses), (hands, 2, 2))
+
+    def test_threads(self):
+        main.Evaluate.SetCache(1000)
+        rows = [GetCardsByStr(random.Random(x).sample(GetDeck(), 7)) for x in range(50)]
+        expected = [main.LookupTable.GetStrength(x) for x in rows]
+        results = []
+
+        def Work():
+            results.append([main.Evaluate.GetStrength(x) for x in rows])
+
+        threads = [threading.Thread(target=Work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = main.Evaluate.cache.GetStats()
+        self.assertTrue(all(x == expected for x in results) and stats["hits"] + stats["misses"] == 200)
+
+    def test_disabled(self):
+        main.Evaluate.SetCache(None)
+        self.assertIsNone(main.Evaluate.cache)
+
+
+class TestIsomorphism(unittest.TestCase):
+
+    def test_equivalent_situations(self):
+        canonical1 = main.Isomorphism.Canonicalize(GetHandByStr(["Ah", "Kh"]), GetCommCardsByStr(["2h", "7h", "9c"]))
+        canonical2 = main.Isomorphism.Canonicalize(GetHandByStr(["As", "Ks"]), GetCommCardsByStr(["2s", "7s", "9d"]))
+        self.assertEqual([str(x) for x in canonical1], [str(x) for x in canonical2])
+        self.assertEqual(canonical1[2], 12)
+
+    def test_different_situations(self):
+        key1 = main.Isomorphism.GetKey([GetHandByStr(["Ah", "Kh"])], GetCommCardsByStr(["2h", "7h", "9c"]))
+        key2 = main.Isomorphism.GetKey([GetHandByStr(["Ah", "Kh"])], GetCommCardsByStr(["2h", "7c", "9c"]))
+        self.assertNotEqual(key1, key2)
+
+    def test_starting_hands(self):
+        multiplicities = {}
+        for card_strs in combinations(GetDeck(), 2):
+            hand, comm_cards, multiplicity = main.Isomorphism.Canonicalize(GetHandByStr(card_strs))
+            multiplicities[str(hand)] = multiplicity
+        self.assertEqual((len(multiplicities), sum(multiplicities.values())), (169, 1326))
+
+    def test_canonical_strength(self):
+        comm_cards = GetCommCardsByStr(["2h", "7h", "9c", "Jd"])
+        myhand = GetHandByStr(["As", "Ks"])
+        hand, canonical_comm_cards, multiplicity = main.Isomorphism.Canonicalize(myhand, comm_cards)
+        self.assertEqual(canonical_comm_cards.GetTurn().rank, "J")
+        self.assertEqual(hand.Read(canonical_comm_cards).GetStrength(), myhand.Read(comm_cards).GetStrength())
+
+    def test_hands_keep_order(self):
+        hands, comm_cards, multiplicity = main.Isomorphism.CanonicalizeHands(
+            [GetHandByStr(["As", "Ks"]), GetHandByStr(["Qd", "Qc"])])
+        self.assertEqual([x.cards[0].rank for x in hands], ["K", "Q"])
+
+
 class TestDeck(unittest.TestCase):
     def test_empty_deck(self):
         deck = main.Deck([])
@@ -438,6 +981,53 @@ class TestDeck(unittest.TestCase):
             deck = main.Deck([])
             deck.GetCard()
 
+    def test_seeded_rng(self):
+        deck1 = main.Deck(rng=random.Random(5))
+        deck2 = main.Deck(rng=random.Random(5))
+        self.assertEqual([deck1.GetCard() for _ in range(10)], [deck2.GetCard() for _ in range(10)])
+
+    def test_get_all_the_cards_are_distinct(self):
+        deck = main.Deck(rng=random.Random(1))
+        cards = [deck.GetCard() for _ in range(52)]
+        self.assertEqual(len(set(cards)), 52)
+
+    def test_reset(self):
+        deck = main.Deck()
+        for i in range(10):
+            deck.GetCard()
+        deck.Reset()
+        self.assertEqual(deck.GetCardSet(), main.CardSet(main.Card.DECK))
+
+    def test_remove_cards(self):
+        deck = main.Deck()
+        dead_cards = GetCardsByStr(["As", "Kd"])
+        deck.RemoveCards(dead_cards)
+        cards = [deck.GetCard() for _ in range(50)]
+        self.assertTrue(len(cards) == 50 and not set(cards) & set(dead_cards))
+
+    def test_remove_cards_survive_reset(self):
+        deck = main.Deck()
+        deck.GetCard()
+        deck.RemoveCards(GetCardsByStr(["As", "Kd"]))
+        deck.Reset()
+        self.assertEqual(len(deck.cards), 50)
+
+    def test_remove_dealt_card(self):
+        deck = main.Deck(rng=random.Random(2))
+        card = deck.GetCard()
+        deck.RemoveCards([card])
+        deck.Reset()
+        self.assertTrue(len(deck.cards) == 51 and card not in deck.cards)
+
+    def test_cards_is_the_live_list(self):
+        deck = main.Deck(rng=random.Random(3))
+        card = deck.cards.pop()
+        deck.cards.remove(main.Card("As"))
+        cards = [deck.GetCard() for _ in range(50)]
+        self.assertTrue(deck.cards == [] and card not in cards and main.Card("As") not in cards)
+        deck.Reset()
+        self.assertEqual(len(deck.cards), 50)
+
 
 class TestHandvsHand(unittest.TestCase):
 
@@ -594,5 +1184,632 @@ class TestHandvsHand(unittest.TestCase):
         self.assertEqual(main.Evaluate.GetWinnerHands(comm_cards, [myhand, herhand]), [myhand, herhand])
 
 
+class TestEquity(unittest.TestCase):
+
+    def test_monte_carlo_is_reproducible(self):
+        hands = [GetHandByStr(["As", "Ad"]), GetHandByStr(["Kc", "Qc"])]
+        result1 = main.Equity.MonteCarlo(hands, iterations=500, seed=3)
+        result2 = main.Equity.MonteCarlo(hands, iterations=500, seed=3)
+        self.assertEqual(result1.equities, result2.equities)
+
+    def test_monte_carlo_equities_sum_to_one(self):
+        hands = [GetHandByStr(["As", "Kd"]), GetHandByStr(["Ac", "Kh"]), GetHandByStr(["7c", "2d"])]
+        result = main.Equity.MonteCarlo(hands, iterations=500, seed=1)
+        self.assertAlmostEqual(sum(result.equities), 1.0)
+
+    def test_monte_carlo_favourite(self):
+        hands = [GetHandByStr(["As", "Ad"]), GetHandByStr(["7c", "2d"])]
+        result = main.Equity.MonteCarlo(hands, iterations=2000, seed=2)
+        self.assertTrue(0.82 < result.GetEquity(hands[0]) < 0.92)
+
+    def test_monte_carlo_with_board(self):
+        comm_cards = GetCommCardsByStr(["2s", "7h", "8c", "Ad", "Jc"])
+        hands = [GetHandByStr(["As", "Kd"]), GetHandByStr(["7c", "2d"])]
+        result = main.Equity.MonteCarlo(hands, comm_cards, iterations=10, seed=2)
+        self.assertEqual(result.wins, [0, 10])
+
+    def test_monte_carlo_workers(self):
+        hands = [GetHandByStr(["As", "Ad"]), GetHandByStr(["Kc", "Qc"])]
+        result1 = main.Equity.MonteCarlo(hands, iterations=400, workers=2, seed=4)
+        result2 = main.Equity.MonteCarlo(hands, iterations=400, workers=2, seed=4)
+        self.assertTrue(result1.runouts == 400 and result1.wins == result2.wins)
+
+    def test_exact_flop(self):
+        comm_cards = GetCommCardsByStr(["2c", "7c", "Jd"])
+        hands = [GetHandByStr(["As", "Ad"]), GetHandByStr(["Kc", "Qc"])]
+        result = main.Equity.Exact(hands, comm_cards)
+        self.assertTrue(result.exact and result.runouts == 990)
+        self.assertAlmostEqual(sum(result.equities), 1.0)
+
+    def test_exact_turn_outs(self):
+        comm_cards = GetCommCardsByStr(["2c", "7c", "Jd", "3h"])
+        hands = [GetHandByStr(["As", "Ad"]), GetHandByStr(["Kc", "Qc"])]
+        result = main.Equity.Exact(hands, comm_cards)
+        self.assertEqual((result.runouts, result.wins[1]), (44, 9))
+
+    def test_exact_river_chop(self):
+        comm_cards = GetCommCardsByStr(["10c", "Jc", "Qc", "Kc", "Ac"])
+        hands = [GetHandByStr(["As", "Ad"]), GetHandByStr(["Kd", "Qd"])]
+        result = main.Equity.Exact(hands, comm_cards)
+        self.assertEqual((result.ties, result.equities), ([1, 1], [0.5, 0.5]))
+
+    def test_exact_workers(self):
+        comm_cards = GetCommCardsByStr(["2c", "7c", "Jd"])
+        hands = [GetHandByStr(["As", "Ad"]), GetHandByStr(["Kc", "Qc"])]
+        result = main.Equity.Exact(hands, comm_cards, workers=2)
+        self.assertEqual(result.wins, main.Equity.Exact(hands, comm_cards).wins)
+
+    def test_calculate_switches_to_exact(self):
+        hands = [GetHandByStr(["As", "Ad"]), GetHandByStr(["Kc", "Qc"])]
+        flop_result = main.Equity.Calculate(hands, GetCommCardsByStr(["2c", "7c", "Jd"]))
+        preflop_result = main.Equity.Calculate(hands, iterations=100, seed=1)
+        self.assertTrue(flop_result.exact and not preflop_result.exact)
+
+    def test_cannot_share_cards(self):
+        with self.assertRaises(ValueError):
+            main.Equity.MonteCarlo([GetHandByStr(["As", "Ad"]), GetHandByStr(["As", "Qc"])], iterations=10)
+
+
+class TestRange(unittest.TestCase):
+
+    def test_parse_counts(self):
+        counts = [len(main.Range.Parse(x)) for x in ["QQ+", "AKs", "AQo", "AK", "22+", "A2s+", "KTo+", "A2s-A5s",
+                                                     "99-QQ", "AhKd", "10h9h"]]
+        self.assertEqual(counts, [18, 4, 12, 16, 78, 48, 36, 16, 24, 1, 1])
+
+    def test_parse_list(self):
+        self.assertEqual(len(main.Range.Parse("QQ+, AKs, AQo")), 34)
+
+    def test_parse_weight(self):
+        range_obj = main.Range.Parse("AKs:0.25, QQ")
+        self.assertEqual(sorted(set(range_obj.combos.values())), [0.25, 1.0])
+
+    def test_parse_lower_case(self):
+        self.assertEqual(main.Range.Parse("aks").combos, main.Range.Parse("AKs").combos)
+
+    def test_cannot_parse_incorrect_token(self):
+        for range_string in ["AKx", "AA-KQ", "XX", "AhAh", "AK:abc"]:
+            with self.assertRaises(main.PokerExceptions.IncorrectRangeString):
+                main.Range.Parse(range_string)
+
+    def test_hands_remove_blocked_combos(self):
+        hands = main.Range.Parse("AA").GetHands(main.CardSet(GetCardsByStr(["As"])).mask)
+        self.assertEqual(len(hands), 3)
+
+    def test_exact_matches_combo_pairs(self):
+        range1 = main.Range.Parse("QQ+:0.5, AKs, AhQd")
+        range2 = main.Range.Parse("JJ, A2s+, KQo:0.3")
+        comm_cards = GetCommCardsByStr(["2c", "7d", "Jh", "3s"])
+        result = main.Equity.RangeVsRange(range1, range2, comm_cards)
+        dead_mask = comm_cards.GetCardSet().mask
+        total, weights = 0.0, 0.0
+        for hand1, weight1 in range1.GetHands(dead_mask):
+            for hand2, weight2 in range2.GetHands(dead_mask):
+                if not hand1.GetCardSet().IsDisjoint(hand2.GetCardSet()):
+                    continue
+                total += weight1 * weight2 * main.Equity.Exact([hand1, hand2], comm_cards).equities[0]
+                weights += weight1 * weight2
+        self.assertTrue(result.exact)
+        self.assertAlmostEqual(result.equities[0], total / weights)
+
+    def test_preflop_sampled(self):
+        range1 = main.Range.Parse("AA")
+        range2 = main.Range.Parse("72o")
+        result = main.Equity.RangeVsRange(range1, range2, iterations=1000, seed=1)
+        self.assertTrue(not result.exact and result.runouts == 1000 and 0.82 < result.equities[0] < 0.94)
+
+    def test_cannot_calculate_blocked_ranges(self):
+        with self.assertRaises(ValueError):
+            main.Equity.RangeVsRange(main.Range.Parse("AhAd"), main.Range.Parse("AhAs"), iterations=10)
+
+
+class TestCardCombinations(unittest.TestCase):
+
+    def test_masks_match_combinations(self):
+        dead_mask = main.CardSet(GetCardsByStr(["Ah", "Kd", "2c"])).mask
+        live = [x for x in range(52) if not dead_mask >> x & 1]
+        for k in range(4):
+            masks = list(main.CardCombinations.GetMasks(k, dead_mask))
+            expected = [sum(1 << x for x in cards) for cards in combinations(live, k)]
+            self.assertEqual(sorted(masks), sorted(expected))
+            self.assertEqual(len(masks), main.CardCombinations.Count(k, dead_mask))
+
+    def test_masks_are_in_colex_order(self):
+        masks = list(main.CardCombinations.GetMasks(3, 0xFFFFF))
+        self.assertEqual(masks, sorted(masks))
+
+    def test_deltas_update_previous_mask(self):
+        previous = 0
+        for mask, removed, added in main.CardCombinations.GetDeltas(3, 0xFFFFFF):
+            self.assertEqual(previous & ~removed | added, mask)
+            self.assertFalse(removed & added)
+            previous = mask
+
+    def test_too_many_cards(self):
+        self.assertEqual(list(main.CardCombinations.GetMasks(2, main.CardSet.FULL ^ 1)), [])
+        self.assertEqual(list(main.CardCombinations.GetMasks(0)), [0])
+
+
+class TestNutRanking(unittest.TestCase):
+
+    def test_ranks_all_live_combos(self):
+        ranking = main.NutRanking(GetCommCardsByStr(["Ah", "Kh", "7d"]), GetCardsByStr(["2c"]))
+        self.assertEqual(len(ranking), 1128)
+        self.assertEqual(sum(len(x) for x in ranking.groups), 1128)
+        self.assertEqual(ranking.strengths, sorted(ranking.strengths, reverse=True))
+
+    def test_nuts_and_tie_groups(self):
+        ranking = main.NutRanking(GetCommCardsByStr(["Ah", "Kh", "Qh", "2c", "3d"]))
+        self.assertEqual([str(x) for x in ranking.GetNuts()], ["10hJh"])
+        ranking = main.NutRanking(GetCommCardsByStr(["Ah", "Kd", "Qc", "7s", "2h"]))
+        self.assertEqual(len(ranking.GetNuts()), 16)
+        self.assertEqual(ranking.GetRank(GetHandByStr(["Ac", "Ad"])), 1)
+        self.assertEqual(len(ranking.GetHands()[1]), 3)
+
+    def test_percentile_matches_brute_force(self):
+        comm_cards = GetCommCardsByStr(["9s", "8s", "2d", "Kc"])
+        hand = GetHandByStr(["Ks", "Qs"])
+        hand_mask = hand.GetCardSet().mask
+        strength = main.LookupTable.GetMaskStrength(comm_cards.GetCardSet().mask | hand_mask)
+        ranking = main.NutRanking.Get(comm_cards)
+        scores = [(x < strength) + (x == strength) / 2 for mask, x in zip(ranking.masks, ranking.strengths)
+                  if not mask & hand_mask]
+        self.assertAlmostEqual(main.NutRanking.Percentile(hand, comm_cards), sum(scores) / len(scores))
+
+    def test_rankings_are_cached_per_board(self):
+        comm_cards = GetCommCardsByStr(["9s", "8s", "2d"])
+        self.assertIs(main.NutRanking.Get(comm_cards), main.NutRanking.Get(GetCommCardsByStr(["2d", "9s", "8s"])))
+
+    def test_cannot_rank_dead_hand(self):
+        ranking = main.NutRanking.Get(GetCommCardsByStr(["9s", "8s", "2d"]))
+        with self.assertRaises(ValueError):
+            ranking.GetPercentile(GetHandByStr(["9s", "Ad"]))
+        with self.assertRaises(ValueError):
+            main.NutRanking(GetCommCardsByStr(["9s"]))
+
+
+class TestHandPotential(unittest.TestCase):
+
+    def test_exact_matches_brute_force(self):
+        comm_cards = GetCommCardsByStr(["Ah", "Kh", "7d", "2c"])
+        hand = GetHandByStr(["Qh", "Jh"])
+        hand_mask = hand.GetCardSet().mask
+        board_mask = comm_cards.GetCardSet().mask
+        live = [x for x in range(52) if not (hand_mask | board_mask) >> x & 1]
+        potentials = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+
+        def Compare(strength, other):
+            return 0 if strength > other else 1 if strength == other else 2
+
+        for card1, card2 in combinations(live, 2):
+            opponent_mask = 1 << card1 | 1 << card2
+            state = Compare(main.LookupTable.GetMaskStrength(board_mask | hand_mask),
+                            main.LookupTable.GetMaskStrength(board_mask | opponent_mask))
+            for river in live:
+                if river in (card1, card2):
+                    continue
+                river_mask = board_mask | 1 << river
+                potentials[state][Compare(main.LookupTable.GetMaskStrength(river_mask | hand_mask),
+                                          main.LookupTable.GetMaskStrength(river_mask | opponent_mask))] += 1
+        ahead, tied, behind = [sum(x) for x in potentials]
+        ppot = (potentials[2][0] + potentials[2][1] / 2 + potentials[1][0] / 2) / (behind + tied / 2)
+        npot = (potentials[0][2] + potentials[1][2] / 2 + potentials[0][1] / 2) / (ahead + tied / 2)
+        potential = main.HandPotential.Calculate(hand, comm_cards)
+        self.assertAlmostEqual(potential.ppot, ppot)
+        self.assertAlmostEqual(potential.npot, npot)
+        self.assertAlmostEqual(potential.hs, main.NutRanking.Percentile(hand, comm_cards))
+        self.assertAlmostEqual(potential.ehs, potential.hs * (1 - npot) + (1 - potential.hs) * ppot)
+
+    def test_river_has_no_potential(self):
+        potential = main.HandPotential.Calculate(GetHandByStr(["As", "Ad"]),
+                                                 GetCommCardsByStr(["Ah", "Kh", "7d", "2c", "3s"]))
+        self.assertEqual((potential.ppot, potential.npot), (0.0, 0.0))
+        self.assertEqual(potential.ehs, potential.hs)
+
+    def test_sampled_is_close_to_exact(self):
+        comm_cards = GetCommCardsByStr(["9s", "8s", "2d", "Kc"])
+        hand = GetHandByStr(["As", "5s"])
+        exact = main.HandPotential.Calculate(hand, comm_cards)
+        sampled = main.HandPotential.Calculate(hand, comm_cards, iterations=5000, seed=1)
+        self.assertFalse(sampled.exact)
+        self.assertAlmostEqual(exact.ppot, sampled.ppot, delta=0.03)
+
+    def test_results_are_cached_per_canonical_spot(self):
+        comm_cards = GetCommCardsByStr(["9s", "8s", "2d", "Kc"])
+        potential = main.HandPotential.Calculate(GetHandByStr(["As", "5s"]), comm_cards)
+        isomorphic = main.HandPotential.Calculate(GetHandByStr(["Ah", "5h"]),
+                                                  GetCommCardsByStr(["9h", "8h", "2d", "Kc"]))
+        self.assertIs(potential, isomorphic)
+
+
+class TestOuts(unittest.TestCase):
+
+    def test_turn_outs_by_category(self):
+        result = main.Outs.Calculate(GetHandByStr(["Ah", "5h"]), GetCommCardsByStr(["Kh", "9h", "2c", "3d"]))
+        self.assertEqual(result.category, 1)
+        self.assertEqual({category: len(cards) for category, cards in result.outs.items()}, {6: 9, 5: 3, 2: 6})
+        self.assertEqual(len(result), 18)
+        self.assertAlmostEqual(result.probability, 18 / 46)
+        self.assertEqual(result.runner_runner, {})
+
+    def test_board_pairs_are_not_outs(self):
+        result = main.Outs.Calculate(GetHandByStr(["Ah", "5h"]), GetCommCardsByStr(["Kh", "9h", "2c", "3d"]))
+        self.assertNotIn(main.Card("2d"), result.GetOuts())
+
+    def test_flop_runner_runner(self):
+        result = main.Outs.Calculate(GetHandByStr(["Ah", "5h"]), GetCommCardsByStr(["Kh", "9h", "2c"]))
+        self.assertEqual(len(result.runner_runner[5]), 9)
+        self.assertTrue(all(main.Card("3h") not in x and main.Card("4h") not in x for x in result.runner_runner[5]))
+
+    def test_outs_against_opponents(self):
+        hand = GetHandByStr(["Ah", "5h"])
+        comm_cards = GetCommCardsByStr(["Kh", "9h", "2c", "3d"])
+        opponent = GetHandByStr(["Kd", "Kc"])
+        result = main.Outs.Calculate(hand, comm_cards, [opponent])
+        known = hand.cards + comm_cards.cards + opponent.cards
+        expected = [x for x in main.Card.DECK if x not in known
+                    and main.Evaluate.GetWinnerHands(GetCommCardsByStr(["Kh", "9h", "2c", "3d", str(x)]),
+                                                    [hand, opponent]) == [hand]]
+        self.assertFalse(result.leading)
+        self.assertEqual(result.GetLeadOuts(), expected)
+        self.assertEqual(len(expected), 10)
+        self.assertAlmostEqual(result.lead_probability, 10 / 44)
+        self.assertEqual(len(result.GetOuts()), 18)
+
+    def test_leading_hand_has_no_lead_outs(self):
+        result = main.Outs.Calculate(GetHandByStr(["Ad", "Ah"]), GetCommCardsByStr(["Kh", "9h", "2c", "3d"]),
+                                     [GetHandByStr(["Qs", "Js"])])
+        self.assertTrue(result.leading)
+        self.assertEqual(result.GetLeadOuts(), [])
+        self.assertEqual([str(x) for x in result.outs[4]], ["As", "Ac"])
+        self.assertAlmostEqual(result.lead_probability, 40 / 44)
+
+    def test_cannot_calculate_outs_on_river(self):
+        with self.assertRaises(ValueError):
+            main.Outs.Calculate(GetHandByStr(["Ah", "5h"]), GetCommCardsByStr(["Kh", "9h", "2c", "3d", "4d"]))
+
+
+class TestHandHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "history.bin")
+        rng = random.Random(0)
+        self.deals = []
+        for i in range(200):
+            players, board = rng.randint(1, 4), rng.choice([0, 3, 4, 5])
+            cards = rng.sample(main.Card.DECK, board + 2 * players)
+            self.deals.append((main.CommunityCards(cards[:board]),
+                               [main.Hand(cards[x:x + 2]) for x in range(board, len(cards), 2)]))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def GetStrengths(self, comm_cards, hands):
+        return [main.Evaluate.GetStrength(comm_cards.cards + x.cards) if comm_cards.cards else 0 for x in hands]
+
+    def test_round_trip(self):
+        self.assertEqual(main.HandHistory.Write(self.path, self.deals, players=4), 200)
+        history = main.HandHistory(self.path)
+        for deal, (comm_cards, hands) in zip(self.deals, history):
+            self.assertEqual(comm_cards.cards, deal[0].cards)
+            self.assertEqual([x.cards for x in hands], [x.cards for x in deal[1]])
+        self.assertIsNone(history.GetStrengths(0))
+        history.Close()
+
+    def test_record_size(self):
+        main.HandHistory.Write(self.path, self.deals, players=4, strengths=True)
+        history = main.HandHistory(self.path)
+        record = history.GetRecord(0)
+        self.assertEqual((len(record), os.path.getsize(self.path)), (19, 7 + 19 * 200))
+        self.assertIs(record.obj, history.mmap)
+        del record
+        history.Close()
+
+    def test_stored_strengths(self):
+        main.HandHistory.Write(self.path, self.deals, players=4, strengths=True)
+        history = main.HandHistory(self.path)
+        self.assertEqual([history.GetStrengths(i) for i in range(len(history))],
+                         [self.GetStrengths(*x) for x in self.deals])
+        history.Close()
+
+    def test_append(self):
+        main.HandHistory.Write(self.path, self.deals[:50], players=4)
+        main.HandHistory.Write(self.path, self.deals[50:], append=True)
+        history = main.HandHistory(self.path)
+        self.assertEqual((len(history), history.players), (200, 4))
+        history.Close()
+
+    @unittest.skipIf(main.np is None, "NumPy is not installed")
+    def test_batch_strengths(self):
+        main.HandHistory.Write(self.path, self.deals, players=4)
+        history = main.HandHistory(self.path)
+        strengths = history.GetBatchStrengths(10, 150)
+        for i, deal in enumerate(self.deals[10:150]):
+            self.assertEqual(strengths[i].tolist(), self.GetStrengths(*deal) + [0] * (4 - len(deal[1])))
+        history.Close()
+
+    @unittest.skipIf(main.np is None, "NumPy is not installed")
+    def test_close_with_live_arrays(self):
+        main.HandHistory.Write(self.path, self.deals, players=4)
+        with main.HandHistory(self.path) as history:
+            arrays = history.GetArrays()
+            with self.assertRaises(BufferError):
+                history.Close()
+            self.assertEqual(history.GetDeal(0)[0].cards, self.deals[0][0].cards)
+            del arrays
+        self.assertTrue(history.mmap.closed)
+
+    def test_cannot_pack_too_many_hands(self):
+        with self.assertRaises(ValueError):
+            main.HandHistory.Write(self.path, self.deals, players=2)
+
+    def test_cannot_read_other_file(self):
+        with open(self.path, "wb") as file:
+            file.write(b"NOPE" + bytes(20))
+        with self.assertRaises(ValueError):
+            main.HandHistory(self.path)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.read = main.Hand.__dict__["Read"]
+        self.lookup = main.LookupTable.__dict__["Lookup"]
+        main.Instrumentation.Enable()
+
+    def tearDown(self):
+        main.Instrumentation.Disable()
+
+    def test_disable_restores_originals(self):
+        main.Instrumentation.Disable()
+        self.assertIs(main.Hand.__dict__["Read"], self.read)
+        self.assertIs(main.LookupTable.__dict__["Lookup"], self.lookup)
+        self.assertIs(main.ProcessPoolExecutor, main.InstrumentedExecutor.__base__)
+
+    def test_category_counts(self):
+        comm_cards = GetCommCardsByStr(["Ah", "Kh", "Qh", "2c", "3d"])
+        GetHandByStr(["Jh", "10h"]).Read(comm_cards)
+        GetHandByStr(["2d", "3c"]).Read(comm_cards)
+        GetHandByStr(["Jh", "10h"]).Read(comm_cards, main.EvalMode.HISTOGRAM)
+        GetHandByStr(["2d", "3c"]).ReadDetectors(comm_cards)
+        categories = main.Instrumentation.GetSnapshot()["categories"]
+        self.assertEqual((categories["StraightFlush"], categories["TwoPair"]), (2, 2))
+
+    def test_latencies(self):
+        comm_cards = GetCommCardsByStr(["Ah", "Kh", "Qh", "2c", "3d"])
+        hands = [GetHandByStr(["Jh", "10h"]), GetHandByStr(["2d", "3c"])]
+        for i in range(3):
+            main.Evaluate.GetWinnerHands(comm_cards, hands)
+        hands[0].ReadDetectors(comm_cards)
+        latencies = main.Instrumentation.GetSnapshot()["latencies"]
+        self.assertEqual(latencies["Evaluate.GetWinnerHands"]["count"], 3)
+        self.assertEqual(sum(latencies["Evaluate.GetWinnerHands"]["buckets"]), 3)
+        self.assertEqual(latencies["Evaluate.RoyalFlush.IsRoyalFlush"]["count"], 1)
+
+    def test_worker_throughput(self):
+        hands = [GetHandByStr(["Ah", "Kh"]), GetHandByStr(["2c", "2d"])]
+        result = main.Equity.Exact(hands, GetCommCardsByStr(["3h", "7d", "9s"]), workers=2)
+        workers = main.Instrumentation.GetSnapshot()["workers"]
+        self.assertEqual(sum(x["items"] for x in workers.values()), result.runouts)
+        self.assertEqual(sum(x["jobs"] for x in workers.values()), 2)
+
+    def test_prometheus(self):
+        main.Evaluate.SetCache(100)
+        try:
+            comm_cards = GetCommCardsByStr(["Ah", "Kh", "Qh", "2c", "3d"])
+            main.Evaluate.GetWinnerHands(comm_cards, [GetHandByStr(["Jh", "10h"])])
+            text = main.Instrumentation.GetPrometheus()
+        finally:
+            main.Evaluate.SetCache(None)
+        self.assertIn('poker_evaluations_total{category="StraightFlush"} 1', text.splitlines())
+        self.assertIn('poker_call_seconds_count{function="Evaluate.GetWinnerHands"} 1', text.splitlines())
+        self.assertIn('poker_cache_misses_total{cache="eval"} 1', text.splitlines())
+
+    def test_profile(self):
+        with main.Profile(limit=5) as profile:
+            main.Equity.Exact([GetHandByStr(["Ah", "Kh"]), GetHandByStr(["2c", "2d"])],
+                              GetCommCardsByStr(["3h", "7d", "9s", "Qc"]))
+        self.assertIn("ExactWorker", profile.stats)
+        self.assertTrue(profile.seconds > 0 and profile.memory_peak is not None)
+
+
+class TestCommandLine(unittest.TestCase):
+
+    def Run(self, lines, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, "input.txt")
+            output_path = os.path.join(directory, "output.txt")
+            with open(input_path, "w") as file:
+                file.write("\n".join(lines) + "\n")
+            self.assertEqual(main.Main([input_path, "-o", output_path] + list(args)), 0)
+            with open(output_path) as file:
+                return file.read().splitlines()
+
+    def test_text_lines(self):
+        output = self.Run(["Js Qh 3s 5s 6s | Qd 7d | Qc 8s", "", "Ah Kh Qh Jh 10h | 2c 3c | 2d 3d"])
+        self.assertEqual(output, ["1\tPair:3576 Flush:6008", "0,1\tStraightFlush:7462 StraightFlush:7462"])
+
+    def test_json_lines(self):
+        output = self.Run(['{"board": ["Js", "Qh", "3s", "5s", "6s"], "hands": [["Qd", "7d"], ["Qc", "8s"]]}'],
+                          "-f", "json")
+        self.assertEqual(output, ['{"winners": [1], "categories": ["Pair", "Flush"], "strengths": [3576, 6008]}'])
+
+    def test_errors_keep_order(self):
+        output = self.Run(["Js Qh 3s 5s 6s | Qd 7d | Qd 8s", "Js Qh 3s 5s 6s | Qd 7d | Xx 8s",
+                           "Js Qh 3s 5s 6s | Qd 7d | Qc 8s"], "-b", "1")
+        self.assertEqual([x.split("\t")[0] for x in output], ["error", "error", "1"])
+        self.assertTrue(output[0].endswith("line 1: The same card can't be in more than one place!"))
+
+    def test_invalid_utf8_line(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, "input.txt")
+            output_path = os.path.join(directory, "output.txt")
+            with open(input_path, "wb") as file:
+                file.write(b"Js Qh 3s 5s 6s | Qd 7d | Qc 8s\n\xff\xfe\nAh Kh Qh Jh 10h | 2c 3c | 2d 3d\n")
+            self.assertEqual(main.Main([input_path, "-o", output_path]), 0)
+            with open(output_path) as file:
+                output = file.read().splitlines()
+        self.assertEqual([x.split("\t")[0] for x in output], ["1", "error", "0,1"])
+
+    def test_workers_match(self):
+        rng = random.Random(0)
+        lines = []
+        for i in range(50):
+            cards = [str(x) for x in rng.sample(main.Card.DECK, 9)]
+            lines.append(f"{' '.join(cards[:5])} | {' '.join(cards[5:7])} | {' '.join(cards[7:])}")
+        self.assertEqual(self.Run(lines, "-w", "2", "-b", "8"), self.Run(lines))
+
+
+class TestBench(unittest.TestCase):
+
+    def test_category_cards(self):
+        rng = random.Random(0)
+        for category in main.Evaluate.CATEGORIES:
+            self.assertEqual(bench.GetCategory(bench.GetCategoryCards(rng, category)), category)
+
+    def test_percentile(self):
+        self.assertEqual([bench.GetPercentile([1, 2, 3, 4, 5], x) for x in (0, 50, 90, 100)], [1, 3, 4.6, 5])
+
+    def test_compare_flags_regressions(self):
+        baseline = {"a": {"ops_per_sec": 100.0}, "b": {"ops_per_sec": 100.0}}
+        results = {"a": {"ops_per_sec": 90.0}, "b": {"ops_per_sec": 70.0}, "c": {"ops_per_sec": 1.0}}
+        regressions, lines = bench.Compare(results, baseline, 0.2)
+        self.assertEqual((regressions, len(lines)), (["b"], 2))
+
+    def test_run_reports_percentiles(self):
+        results = bench.Run([("noop", lambda x: x, [1] * 10)], rounds=2)
+        self.assertEqual(results["noop"]["ops"], 20)
+        self.assertTrue(results["noop"]["p50_us"] <= results["noop"]["p99_us"])
+
+
+class TestPreflopTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "preflop.bin")
+        cls.aces = GetHandByStr(["As", "Ad"])
+        cls.computed = main.PreflopTable.Generate(cls.path, rows=[main.PreflopTable.GetClassIndex(cls.aces)],
+                                                  iterations=30, seed=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        main.Equity.LoadPreflopTable(None)
+        cls.directory.cleanup()
+
+    def test_class_names(self):
+        names = [main.PreflopTable.GetClassName(x) for x in range(169)]
+        self.assertEqual((names[0], names[1], names[13], names[168]), ("AA", "AKs", "AKo", "22"))
+
+    def test_class_index(self):
+        hand = GetHandByStr(["9c", "Kc"])
+        self.assertEqual(main.PreflopTable.GetClassName(main.PreflopTable.GetClassIndex(hand)), "K9s")
+
+    def test_combo_index(self):
+        indexes = [main.PreflopTable.GetComboIndex(main.Hand(list(x))) for x in combinations(main.Card.DECK, 2)]
+        self.assertEqual(indexes, list(range(1326)))
+
+    def test_resume(self):
+        rows = [main.PreflopTable.GetClassIndex(self.aces)]
+        self.assertEqual((self.computed, main.PreflopTable.Generate(self.path, rows=rows, iterations=30)), (1, 0))
+
+    def test_cannot_resume_with_other_iterations(self):
+        with self.assertRaises(ValueError):
+            main.PreflopTable.Generate(self.path, rows=[0])
+
+    def test_load(self):
+        table = main.PreflopTable(self.path)
+        try:
+            equity = table.GetEquity(self.aces, GetHandByStr(["7c", "2d"]))
+            mirrored = table.GetEquity(GetHandByStr(["7c", "2d"]), self.aces)
+            self.assertTrue(0.8 < equity < 0.95 and abs(equity + mirrored - 1) < 1e-6 and not table.IsComplete())
+        finally:
+            table.Close()
+
+    def test_cannot_get_missing_equity(self):
+        table = main.PreflopTable(self.path)
+        try:
+            with self.assertRaises(ValueError):
+                table.GetEquity(GetHandByStr(["Ks", "Kd"]), GetHandByStr(["7c", "2d"]))
+        finally:
+            table.Close()
+
+    def test_pooled_generate_matches_serial(self):
+        paths = [os.path.join(self.directory.name, f"pooled{x}.bin") for x in (1, 2)]
+        for workers, path in zip((1, 2), paths):
+            main.PreflopTable.Generate(path, rows=[0, 1], workers=workers, iterations=5, seed=2)
+        contents = []
+        for path in paths:
+            with open(path, "rb") as file:
+                contents.append(file.read())
+        self.assertEqual(contents[0], contents[1])
+
+    def test_isomorphic_matchups_are_computed_once(self):
+        path = os.path.join(self.directory.name, "isomorphic.bin")
+        main.PreflopTable.Create(path, main.PreflopTable.COMBOS, 1)
+        jobs = []
+
+        def Map(function, x):
+            jobs.extend(x)
+            return map(function, x)
+
+        with open(path, "r+b") as file:
+            main.PreflopTable.WriteRows(file, main.PreflopTable.COMBOS, [0, 1], {}, 1, 1, Map)
+        keys = [x[0] for x in jobs]
+        self.assertTrue(len(keys) == len(set(keys)) and len(keys) < 1326)
+        table = main.PreflopTable(path)
+        try:
+            hand = GetHandByStr(["2h", "3h"])
+            self.assertEqual(table.GetEquity(hand, GetHandByStr(["4d", "5d"])),
+                             table.GetEquity(hand, GetHandByStr(["4s", "5s"])))
+        finally:
+            table.Close()
+
+    def test_exact_flag(self):
+        path = os.path.join(self.directory.name, "exact.bin")
+        main.PreflopTable.Create(path, main.PreflopTable.COMBOS)
+        table = main.PreflopTable(path)
+        try:
+            self.assertEqual((table.iterations, table.IsExact()), (None, True))
+        finally:
+            table.Close()
+
+    def test_cannot_load_other_file(self):
+        path = os.path.join(self.directory.name, "other.bin")
+        with open(path, "wb") as file:
+            file.write(bytes(64))
+        with self.assertRaises(ValueError):
+            main.PreflopTable(path)
+
+    def test_class_table_is_opt_in(self):
+        main.Equity.LoadPreflopTable(self.path)
+        try:
+            hands = [self.aces, GetHandByStr(["Qc", "Jc"])]
+            result = main.Equity.Preflop(*hands)
+            self.assertEqual(result.equities[0], main.Equity.preflop_table.GetEquity(*hands))
+            self.assertEqual((result.wins, result.ties, result.runouts, result.exact), ([0, 0], [0, 0], 1, False))
+            self.assertEqual(main.Equity.Calculate(hands, iterations=50, seed=1).runouts, 50)
+        finally:
+            main.Equity.LoadPreflopTable(None)
+
+    def test_equity_calculate_uses_combo_table(self):
+        path = os.path.join(self.directory.name, "combos.bin")
+        hands = [self.aces, GetHandByStr(["Qc", "Jc"])]
+        main.PreflopTable.Generate(path, main.PreflopTable.COMBOS, rows=[main.PreflopTable.GetComboIndex(hands[0])],
+                                   iterations=5, seed=1)
+        main.Equity.LoadPreflopTable(path)
+        try:
+            result = main.Equity.Calculate(hands)
+            self.assertEqual(result.equities[0], main.Equity.preflop_table.GetEquity(*hands))
+            self.assertEqual((main.Equity.preflop_table.iterations, result.exact), (5, False))
+            hands = [GetHandByStr(["Kc", "Qc"]), GetHandByStr(["Jh", "10h"])]
+            self.assertFalse(main.Equity.preflop_table.HasEquity(*hands))
+            result = main.Equity.Calculate(hands, iterations=50, seed=1, threshold=0)
+            self.assertEqual((result.runouts, result.exact), (50, False))
+        finally:
+            main.Equity.LoadPreflopTable(None)
+
+
 if __name__ == "__main__":
     unittest.main()